@@ -1,13 +1,75 @@
 import argparse
+import asyncio
+import bisect
+import bz2
+import cProfile
+import csv
+import functools
+import glob
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import lzma
+import mmap
+import os
+import pstats
+import queue
+import random
 import re
-from collections import Counter
-from datetime import datetime
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager, nullcontext, redirect_stdout
+from operator import itemgetter
+from datetime import datetime, timedelta, timezone
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+LOG_LEVELS = ("INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+# Leading bytes of each supported compressed format
+COMPRESSION_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+}
+_COMPRESSED_OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+
+def detect_compression(file_path):
+    """Returns 'gzip', 'bz2' or 'xz' based on the file's magic bytes, or None for plain text."""
+    with open(file_path, "rb") as file:
+        head = file.read(6)
+    for name, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_log_file(file_path):
+    """Opens a log file for reading text, transparently decompressing gzip, bz2 and xz streams."""
+    opener = _COMPRESSED_OPENERS.get(detect_compression(file_path), open)
+    return opener(file_path, "rt")
 
 
 def read_log_file(file_path):
     """Reads the log file line by line to handle large files efficiently."""
     try:
-        with open(file_path, 'r') as file:
+        with open_log_file(file_path) as file:
             for line in file:
                 yield line.strip()  # Using a generator to process large files
     except FileNotFoundError:
@@ -15,59 +77,1901 @@ def read_log_file(file_path):
         return []
 
 
+# Compiled once at import; re.match(pattern_string, ...) would go through the re cache on every line.
+# DOTALL lets the message of a folded multi-line entry (see fold_continuation_lines) span its newlines.
+LOG_LINE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) (INFO|WARNING|ERROR|CRITICAL) (.+)$', re.DOTALL)
+_ENTRY_START_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}')
+
+
+def fold_continuation_lines(raw_lines, max_lines=200, max_chars=65536, _is_entry_start=_ENTRY_START_PATTERN.match):
+    """Attaches continuation lines (stack traces, wrapped messages) to the entry they follow.
+
+    Every line that does not start with a timestamp is appended, newline-separated, to the
+    preceding entry. At most `max_lines` lines / `max_chars` characters are kept per entry; the
+    rest are dropped and counted in a final "... N more lines" line, so one huge trace cannot
+    exhaust memory. Blank lines and lines before the first entry are passed through unchanged
+    (and rejected as invalid as before).
+    """
+    entry = None
+    continuation = []
+    size = dropped = 0
+    for line in raw_lines:
+        if _is_entry_start(line):
+            if entry is not None:
+                # The common case, an entry without continuation lines, is yielded as is
+                yield _join_continuation(entry, continuation, dropped) if continuation else entry
+                continuation = []
+                dropped = 0
+            entry = line
+            size = len(line)
+        elif entry is None or not line:
+            yield line
+        elif len(continuation) < max_lines and size + len(line) < max_chars:
+            continuation.append(line)
+            size += len(line) + 1
+        else:
+            dropped += 1
+    if entry is not None:
+        yield _join_continuation(entry, continuation, dropped) if continuation else entry
+
+
+def _join_continuation(entry, continuation, dropped):
+    if dropped:
+        continuation.append(f"... {dropped} more lines")
+    return "\n".join([entry, *continuation])
+
+
+def parse_log_fields(line, _match=LOG_LINE_PATTERN.match):
+    """Parses a log line into a (timestamp, level, message) tuple, or None if it is malformed."""
+    match = _match(line)
+    return match.groups() if match else None
+
+
+_INVALID_LINE_PREFIX = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}(?: (INFO|WARNING|ERROR|CRITICAL)\b)?')
+INVALID_SAMPLE_LIMIT = 5
+
+
+def invalid_line_reason(line, log_format="default"):
+    """Says why the parser rejected a line. Only called for invalid lines, so it may be slow."""
+    if not line.strip():
+        return "blank line"
+    if log_format != "default":
+        return f"unrecognised {log_format} line"
+    match = _INVALID_LINE_PREFIX.match(line)
+    if match is None:
+        return "no timestamp"
+    if match.group(1) is None:
+        return "unknown level"
+    if not line[match.end():].strip():
+        return "missing message"
+    return "malformed"
+
+
+class InvalidLines:
+    """Counted, sampled diagnostics for lines that fail to parse, instead of one print per line.
+
+    Keeps per-reason totals and the first INVALID_SAMPLE_LIMIT lines. If `reject_file` (an open,
+    buffered text file) is given, every rejected line is also written to it.
+    """
+
+    def __init__(self, reject_file=None, log_format="default"):
+        self.counts = Counter()
+        self.samples = []
+        self.reject_file = reject_file
+        self.log_format = log_format
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def add(self, line):
+        self.counts[invalid_line_reason(line, self.log_format)] += 1
+        if len(self.samples) < INVALID_SAMPLE_LIMIT:
+            self.samples.append(line)
+        if self.reject_file is not None:
+            self.reject_file.write(line + "\n")
+
+    def merge(self, other):
+        """Folds in the diagnostics of a later part of the input."""
+        self.counts.update(other.counts)
+        self.samples.extend(other.samples[:INVALID_SAMPLE_LIMIT - len(self.samples)])
+        return self
+
+    def describe(self):
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in self.counts.most_common())
+        return f"Skipped {self.total} invalid log entries ({reasons})"
+
+    def to_dict(self):
+        return {"counts": dict(self.counts), "samples": self.samples}
+
+    @classmethod
+    def from_dict(cls, data, reject_file=None, log_format="default"):
+        invalid = cls(reject_file, log_format)
+        invalid.counts.update(data["counts"])
+        invalid.samples = list(data["samples"])
+        return invalid
+
+
 def parse_log_line(line):
     """Parses a log line using regex to extract timestamp, level, and message."""
-    pattern = r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) (INFO|WARNING|ERROR|CRITICAL) (.+)$'
-    match = re.match(pattern, line)
-    if match:
-        timestamp_str, level, message = match.groups()
+    fields = parse_log_fields(line)
+    if fields:
+        timestamp_str, level, message = fields
         return {"timestamp": timestamp_str, "level": level, "message": message}
     return None
 
 
+# Epoch milliseconds at the start of each "YYYY-MM-DD HH" hour seen so far
+_HOUR_EPOCH_MS = {}
+
+
+def timestamp_to_epoch_ms(timestamp):
+    """Converts a 'YYYY-MM-DD HH:MM:SS,mmm' timestamp to integer epoch milliseconds (read as UTC).
+
+    Replaces datetime.strptime(): the date and hour are resolved once per distinct hour and cached,
+    so each call is just a dict lookup and three int() conversions. Raises ValueError for
+    out-of-range fields, like strptime does.
+    """
+    hour_start = _HOUR_EPOCH_MS.get(timestamp[:13])
+    if hour_start is None:
+        hour = datetime(int(timestamp[:4]), int(timestamp[5:7]), int(timestamp[8:10]), int(timestamp[11:13]),
+                        tzinfo=timezone.utc)
+        if len(_HOUR_EPOCH_MS) >= 65536:
+            _HOUR_EPOCH_MS.clear()
+        hour_start = _HOUR_EPOCH_MS[timestamp[:13]] = int(hour.timestamp()) * 1000
+
+    minute = int(timestamp[14:16])
+    second = int(timestamp[17:19])
+    if minute > 59 or second > 59:
+        raise ValueError(f"timestamp out of range: {timestamp!r}")
+    return hour_start + minute * 60_000 + second * 1000 + int(timestamp[20:23])
+
+
+LEVEL_CODES = {level: code for code, level in enumerate(LOG_LEVELS)}
+_HOUR_PREFIXES = {}
+
+
+def epoch_ms_to_timestamp(epoch_ms):
+    """Formats epoch milliseconds back into the log's 'YYYY-MM-DD HH:MM:SS,mmm' form (UTC)."""
+    hour, rest = divmod(epoch_ms, 3_600_000)
+    prefix = _HOUR_PREFIXES.get(hour)
+    if prefix is None:
+        if len(_HOUR_PREFIXES) >= 65536:
+            _HOUR_PREFIXES.clear()
+        prefix = _HOUR_PREFIXES[hour] = datetime.fromtimestamp(hour * 3600, timezone.utc).strftime("%Y-%m-%d %H")
+    minute, rest = divmod(rest, 60_000)
+    second, millisecond = divmod(rest, 1000)
+    return f"{prefix}:{minute:02d}:{second:02d},{millisecond:03d}"
+
+
+class LogTable:
+    """Columnar in-memory store of parsed entries, for when entries have to be kept.
+
+    Each entry costs an int64 epoch, a uint8 level code and a uint64 end offset into one shared
+    UTF-8 message buffer, instead of a dict with three strings. Level counting and filtering
+    scan the level column with bytearray.count()/find(), which run in C. Iterating yields the
+    familiar {"timestamp", "level", "message"} dicts.
+    """
+
+    def __init__(self):
+        self.epochs = array("q")
+        self.levels = bytearray()
+        self.message_ends = array("Q")
+        self.messages = bytearray()
+        # Timestamps that do not round-trip through epoch_ms_to_timestamp() (non-ASCII digits or
+        # impossible dates), by row; their epoch column repeats the previous row's value
+        self.raw_timestamps = {}
+
+    def __len__(self):
+        return len(self.levels)
+
+    @property
+    def nbytes(self):
+        return (self.epochs.itemsize * len(self.epochs) + len(self.levels)
+                + self.message_ends.itemsize * len(self.message_ends) + len(self.messages))
+
+    def append(self, timestamp, level, message):
+        epoch_ms = None
+        if timestamp.isascii():
+            try:
+                epoch_ms = timestamp_to_epoch_ms(timestamp)
+            except ValueError:
+                pass
+        if epoch_ms is None:
+            self.raw_timestamps[len(self.levels)] = timestamp
+            epoch_ms = self.epochs[-1] if self.epochs else 0
+        self.epochs.append(epoch_ms)
+        self.levels.append(LEVEL_CODES[level])
+        self.messages += message.encode()
+        self.message_ends.append(len(self.messages))
+
+    def add(self, entry):
+        """Appends a parsed entry dict (usable as an on_entry callback)."""
+        self.append(entry["timestamp"], entry["level"], entry["message"])
+
+    def _append_row(self, other, row):
+        if row in other.raw_timestamps:
+            self.raw_timestamps[len(self.levels)] = other.raw_timestamps[row]
+        self.epochs.append(other.epochs[row])
+        self.levels.append(other.levels[row])
+        self.messages += other.messages[other.message_ends[row - 1] if row else 0:other.message_ends[row]]
+        self.message_ends.append(len(self.messages))
+
+    def timestamp(self, row):
+        raw = self.raw_timestamps.get(row)
+        return raw if raw is not None else epoch_ms_to_timestamp(self.epochs[row])
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("LogTable index out of range")
+        start = self.message_ends[row - 1] if row else 0
+        return {"timestamp": self.timestamp(row), "level": LOG_LEVELS[self.levels[row]],
+                "message": self.messages[start:self.message_ends[row]].decode()}
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def iter_timed(self):
+        """Yields (epoch_ms, entry) pairs, e.g. for a k-way merge of several tables."""
+        for row in range(len(self)):
+            yield self.epochs[row], self[row]
+
+    def rows_with_level(self, level):
+        """Yields the row numbers of entries with the given level."""
+        code = LEVEL_CODES[level]
+        find = self.levels.find
+        row = find(code)
+        while row >= 0:
+            yield row
+            row = find(code, row + 1)
+
+    def filter_level(self, level):
+        result = LogTable()
+        for row in self.rows_with_level(level):
+            result._append_row(self, row)
+        return result
+
+    def count_levels(self):
+        return Counter({level: count for level, code in LEVEL_CODES.items()
+                        if (count := self.levels.count(code))})
+
+    def most_recent(self, level):
+        """Returns the entry with the latest timestamp among those with `level` (the first on ties)."""
+        latest_row = latest_time = None
+        for row in self.rows_with_level(level):
+            raw = self.raw_timestamps.get(row)
+            if raw is None:
+                row_time = self.epochs[row]
+            else:
+                try:
+                    row_time = timestamp_to_epoch_ms(raw)
+                except ValueError:
+                    continue  # An impossible date (e.g. Feb 30) can't be the latest
+            if latest_time is None or row_time > latest_time:
+                latest_row, latest_time = row, row_time
+        return None if latest_row is None else self[latest_row]
+
+
 def filter_logs_by_level(logs, severity_level):
     """Filters logs by severity level."""
+    if isinstance(logs, LogTable):
+        return logs.filter_level(severity_level)
     return [log for log in logs if log["level"] == severity_level]
 
 
 def parse_logs(raw_lines):
-    """Parse raw log lines and return a list of valid entries."""
-    parsed_entries = []
+    """Parse raw log lines and return a LogTable of the valid entries."""
+    parsed_entries = LogTable()
+    invalid = InvalidLines()
     for line in raw_lines:
-        entry = parse_log_line(line)
-        if entry:
-            parsed_entries.append(entry)
+        fields = parse_log_fields(line)
+        if fields:
+            parsed_entries.append(*fields)
         else:
-            print(f"Warning: Skipping invalid log entry: {line}")
+            invalid.add(line)
+    if invalid.total:
+        print(f"Warning: {invalid.describe()}")
     return parsed_entries
 
 
 def count_log_level(parsed_logs):
     """Counts occurrences of each log level (INFO, WARNING, ERROR, CRITICAL)."""
+    if isinstance(parsed_logs, LogTable):
+        return parsed_logs.count_levels()
     levels = [log["level"] for log in parsed_logs]
     return Counter(levels)
 
 
 def find_most_recent_error(parsed_logs):
     """Finds the most recent ERROR log."""
+    if isinstance(parsed_logs, LogTable):
+        return parsed_logs.most_recent("ERROR")
     error_logs = [log for log in parsed_logs if log["level"] == "ERROR"]
     if not error_logs:
         return None
-    return max(error_logs, key=lambda log: datetime.strptime(log["timestamp"], "%Y-%m-%d %H:%M:%S,%f"))
+    return max(error_logs, key=lambda log: timestamp_to_epoch_ms(log["timestamp"]))
+
+
+# Variable parts of a message, masked in this order so a UUID is not read as hex runs and numbers
+_TEMPLATE_MASKS = (
+    (re.compile(r"\b[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}\b"), "<uuid>"),
+    (re.compile(r"\b0[xX][0-9A-Fa-f]+\b|\b[0-9A-Fa-f]{8,}\b"), "<hex>"),
+    (re.compile(r"\d+(?:\.\d+)*"), "<num>"),
+)
+TEMPLATE_LEVELS = ("ERROR", "CRITICAL")
+TEMPLATE_CAPACITY = 256
+
+
+def message_template(message):
+    """Normalises a message into a template, e.g. 'id=0x1f user 42' -> 'id=<hex> user <num>'.
+
+    Only the first line of a folded multi-line message (its stack trace) is used.
+    """
+    message = message.partition("\n")[0]
+    for pattern, mask in _TEMPLATE_MASKS:
+        message = pattern.sub(mask, message)
+    return message
+
+
+class TopKCounter:
+    """Space-Saving heavy-hitter counter: approximate counts of the most frequent keys in fixed memory.
+
+    At most `capacity` keys are tracked. A new key evicts the one with the lowest count and
+    inherits that count as its possible overestimate (`errors`), so every key seen more than
+    N / capacity times is guaranteed to be present and counts are never underestimated.
+    """
+
+    def __init__(self, capacity=TEMPLATE_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # One (count, key) pair per tracked key; counts go stale on increment and are refreshed lazily on eviction
+        self._heap = []
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, key):
+        counts = self.counts
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self.capacity:
+            counts[key] = 1
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (1, key))
+        else:
+            heap = self._heap
+            while True:
+                count, victim = heap[0]
+                if counts[victim] == count:
+                    break
+                heapq.heapreplace(heap, (counts[victim], victim))
+            del counts[victim], self.errors[victim]
+            counts[key] = count + 1
+            self.errors[key] = count
+            heapq.heapreplace(heap, (count + 1, key))
+
+    def floor(self):
+        """Upper bound on the count of any key that is not tracked."""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other):
+        """Folds in another counter (mergeable summaries: untracked keys are charged the other's floor)."""
+        own_floor, other_floor = self.floor(), other.floor()
+        merged = {}
+        for key in self.counts.keys() | other.counts.keys():
+            merged[key] = (self.counts.get(key, own_floor) + other.counts.get(key, other_floor),
+                           self.errors.get(key, own_floor) + other.errors.get(key, other_floor))
+        kept = sorted(merged.items(), key=lambda item: (-item[1][0], item[0]))[:self.capacity]
+        self.counts = {key: count for key, (count, _) in kept}
+        self.errors = {key: error for key, (_, error) in kept}
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def most_common(self, k):
+        """Returns up to k (key, count, error) triples, highest count first."""
+        top = heapq.nsmallest(k, self.counts.items(), key=lambda item: (-item[1], item[0]))
+        return [(key, count, self.errors[key]) for key, count in top]
+
+    def to_list(self):
+        return [[key, count, self.errors[key]] for key, count in self.counts.items()]
+
+    @classmethod
+    def from_list(cls, items, capacity=TEMPLATE_CAPACITY):
+        counter = cls(capacity)
+        for key, count, error in items:
+            counter.counts[key] = count
+            counter.errors[key] = error
+        counter._heap = [(count, key) for key, count in counter.counts.items()]
+        heapq.heapify(counter._heap)
+        return counter
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton: finds which of many literal patterns occur in a text in one pass.
+
+    The trie's failure links are folded into a full transition table when the automaton is built,
+    so scanning costs one dict lookup per character regardless of the number of patterns.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = tuple(dict.fromkeys(pattern for pattern in patterns if pattern))
+        goto = [{}]
+        outputs = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = goto[state][char] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(index)
+
+        # Breadth-first, so a state's failure target (always shallower) is complete before the state
+        fail = [0] * len(goto)
+        transitions = [None] * len(goto)
+        transitions[0] = dict(goto[0])
+        pending = deque(goto[0].values())
+        while pending:
+            state = pending.popleft()
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            for char, next_state in goto[state].items():
+                fail[next_state] = transitions[fail[state]].get(char, 0)
+                outputs[next_state].extend(outputs[fail[next_state]])
+                pending.append(next_state)
+        self._transitions = transitions
+        self._outputs = [tuple(found) for found in outputs]
+
+    @classmethod
+    def from_file(cls, path):
+        """Builds an automaton from a file with one pattern per line (blank lines are ignored)."""
+        with open(path, encoding="utf-8") as f:
+            return cls(line.rstrip("\r\n") for line in f)
+
+    def search(self, text):
+        """Returns the set of indexes (into self.patterns) of the patterns that occur in text."""
+        transitions = self._transitions
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+HISTOGRAM_MAX_BUCKETS = 1 << 20  # Per level: 4 MiB of uint32 counts, e.g. two years of minutes
+HISTOGRAM_FOLLOW_BUCKETS = 1440  # Ring size in --follow mode unless --histogram-buckets says otherwise
+
+
+class LevelHistogram:
+    """Per-level entry counts in fixed-width time buckets, stored as one array('I') column per level.
+
+    Buckets are numbered epoch_ms // interval_ms. Without `ring`, the columns hold every bucket from
+    the earliest to the latest seen and grow at either end, up to `max_buckets`. With `ring`, they
+    are fixed at `ring` slots and bucket b lives in slot b % ring, so only the newest `ring` buckets
+    are kept and a follow session runs in constant memory. Entries outside the span that can be
+    held (or with an unreadable timestamp) are counted in `dropped`.
+    """
+
+    def __init__(self, interval_ms, ring=None, max_buckets=HISTOGRAM_MAX_BUCKETS):
+        self.interval_ms = interval_ms
+        self.ring = ring
+        self.max_buckets = ring or max_buckets
+        self.columns = [array("I", [0]) * (ring or 0) for _ in LOG_LEVELS]
+        self.first_bucket = None  # Oldest bucket held (index 0 of the columns without a ring)
+        self.last_bucket = None
+        self.dropped = 0
+        # With whole-second buckets the milliseconds never matter, so buckets are cached per
+        # 'YYYY-MM-DD HH:MM:SS' prefix, which sorted logs repeat for every entry in that second
+        self._second_buckets = {} if interval_ms % 1000 == 0 else None
+
+    def __len__(self):
+        return 0 if self.first_bucket is None else self.last_bucket - self.first_bucket + 1
+
+    def add(self, timestamp, level):
+        cache = self._second_buckets
+        bucket = cache.get(timestamp[:19]) if cache is not None else None
+        if bucket is None:
+            try:
+                bucket = timestamp_to_epoch_ms(timestamp) // self.interval_ms
+            except ValueError:
+                self.dropped += 1
+                return
+            if cache is not None:
+                if len(cache) >= 65536:
+                    cache.clear()
+                cache[timestamp[:19]] = bucket
+        self._count(bucket, LEVEL_CODES[level], 1)
+
+    def _count(self, bucket, code, count):
+        if self.first_bucket is None or not self.first_bucket <= bucket <= self.last_bucket:
+            if not self._hold(bucket):
+                self.dropped += count
+                return
+        self.columns[code][bucket % self.ring if self.ring else bucket - self.first_bucket] += count
+
+    def _hold(self, bucket):
+        """Widens the held span to include `bucket`. Returns False if it cannot be held."""
+        if self.first_bucket is None:
+            self.first_bucket = self.last_bucket = bucket
+            if not self.ring:
+                for column in self.columns:
+                    column.append(0)
+            return True
+        if bucket < self.first_bucket:
+            if self.last_bucket - bucket >= self.max_buckets:
+                return False
+            if not self.ring:
+                zeros = array("I", [0]) * (self.first_bucket - bucket)
+                for column in self.columns:
+                    column[:0] = zeros
+            # A ring's slots outside the held span are always zero, so they can simply be taken back
+            self.first_bucket = bucket
+            return True
+
+        if self.ring:
+            # Clear the slots of the buckets that are being skipped over or recycled
+            for slot_bucket in range(max(self.last_bucket + 1, bucket - self.ring + 1), bucket + 1):
+                for column in self.columns:
+                    column[slot_bucket % self.ring] = 0
+            self.first_bucket = max(self.first_bucket, bucket - self.ring + 1)
+        elif bucket - self.first_bucket >= self.max_buckets:
+            return False
+        else:
+            zeros = array("I", [0]) * (bucket - self.last_bucket)
+            for column in self.columns:
+                column.extend(zeros)
+        self.last_bucket = bucket
+        return True
+
+    def rows(self):
+        """Yields (bucket start in epoch ms, (INFO, WARNING, ERROR, CRITICAL) counts), oldest first."""
+        if self.first_bucket is None:
+            return
+        columns = self.columns
+        for bucket in range(self.first_bucket, self.last_bucket + 1):
+            index = bucket % self.ring if self.ring else bucket - self.first_bucket
+            yield bucket * self.interval_ms, tuple(column[index] for column in columns)
+
+    def merge(self, other):
+        """Folds in the counts of another histogram with the same interval."""
+        for start, counts in other.rows():
+            for code, count in enumerate(counts):
+                if count:
+                    self._count(start // self.interval_ms, code, count)
+        self.dropped += other.dropped
+        return self
+
+    def to_dict(self):
+        """Returns the histogram as JSON data; only non-empty buckets are listed."""
+        return {
+            "interval_ms": self.interval_ms,
+            "ring": self.ring,
+            "dropped": self.dropped,
+            "buckets": [[start // self.interval_ms, *counts] for start, counts in self.rows() if any(counts)],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["interval_ms"], data["ring"])
+        for bucket, *counts in data["buckets"]:
+            for code, count in enumerate(counts):
+                if count:
+                    histogram._count(bucket, code, count)
+        histogram.dropped = data["dropped"]
+        return histogram
+
+
+class LogSummary:
+    """Running aggregate of a log stream: total entries, level counts, the most recent ERROR and
+    the most frequent ERROR/CRITICAL message templates. With a `matcher` (an AhoCorasick automaton),
+    it also counts the entries whose message contains each pattern, and with `histogram_interval_ms`
+    it counts each level per time bucket (see LevelHistogram). Lines are parsed with the registered
+    `log_format`.
+
+    Entries are folded in one at a time, so memory stays constant no matter how large the log is.
+    """
+
+    def __init__(self, severity_level=None, since_ms=None, until_ms=None, matcher=None, reject_file=None,
+                 log_format="default", histogram_interval_ms=None, histogram_buckets=None):
+        self.severity_level = severity_level
+        self.since_ms = since_ms
+        self.until_ms = until_ms
+        self.total_logs = 0
+        self.filtered = 0  # Valid entries rejected by the level or time filter
+        self.level_counts = Counter()
+        self.most_recent_error = None
+        self.most_recent_error_epoch_ms = None
+        self.error_templates = TopKCounter()
+        self.matcher = matcher
+        self.pattern_hits = [0] * len(matcher.patterns) if matcher is not None else []
+        self.log_format = log_format
+        self.parse_fields = compile_log_format(log_format)
+        self.invalid = InvalidLines(reject_file, log_format)
+        self.histogram = LevelHistogram(histogram_interval_ms, histogram_buckets) if histogram_interval_ms else None
+
+    def __getstate__(self):
+        # Compiled parsers are closures; pool tasks ship the format name and rebuild the parser
+        state = self.__dict__.copy()
+        del state["parse_fields"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.parse_fields = compile_log_format(self.log_format)
+
+    def add(self, entry):
+        """Folds a parsed entry into the summary. Returns False if the level filter rejected it."""
+        return self.add_fields(entry["timestamp"], entry["level"], entry["message"])
+
+    def add_fields(self, timestamp, level, message):
+        """Like add(), but takes the fields directly so the hot loop never builds a dict per line."""
+        if self.severity_level is not None and level != self.severity_level:
+            self.filtered += 1
+            return False
+        if self.since_ms is not None or self.until_ms is not None:
+            try:
+                entry_time = timestamp_to_epoch_ms(timestamp)
+            except ValueError:
+                # An impossible date (e.g. Feb 30) is in no time range
+                self.filtered += 1
+                return False
+            if (self.since_ms is not None and entry_time < self.since_ms) \
+                    or (self.until_ms is not None and entry_time >= self.until_ms):
+                self.filtered += 1
+                return False
+
+        self.total_logs += 1
+        self.level_counts[level] += 1
+        if level in TEMPLATE_LEVELS:
+            self.error_templates.add(message_template(message))
+        if self.matcher is not None:
+            pattern_hits = self.pattern_hits
+            for index in self.matcher.search(message):
+                pattern_hits[index] += 1
+        if self.histogram is not None:
+            self.histogram.add(timestamp, level)
+
+        if level == "ERROR":
+            try:
+                error_time = timestamp_to_epoch_ms(timestamp)
+            except ValueError:
+                return True  # Counted, but an impossible date (e.g. Feb 30) can't be the latest ERROR
+            # Strictly newer only, so the first of several equal timestamps wins just like max() did
+            if self.most_recent_error_epoch_ms is None or error_time > self.most_recent_error_epoch_ms:
+                self.most_recent_error_epoch_ms = error_time
+                self.most_recent_error = {"timestamp": timestamp, "level": level, "message": message}
+        return True
+
+    def consume(self, raw_lines, on_entry=None):
+        """Parses raw lines and folds every valid entry into the summary."""
+        add_fields = self.add_fields
+        parse_fields = self.parse_fields
+        for line in raw_lines:
+            fields = parse_fields(line)
+            if fields is None:
+                self.invalid.add(line)
+            elif add_fields(*fields) and on_entry is not None:
+                timestamp, level, message = fields
+                on_entry({"timestamp": timestamp, "level": level, "message": message})
+        return self
+
+    def merge(self, other):
+        """Folds a partial summary of a later part of the log into this one."""
+        self.total_logs += other.total_logs
+        self.filtered += other.filtered
+        self.level_counts.update(other.level_counts)
+        self.error_templates.merge(other.error_templates)
+        for index, hits in enumerate(other.pattern_hits):
+            self.pattern_hits[index] += hits
+        self.invalid.merge(other.invalid)
+        if self.histogram is not None and other.histogram is not None:
+            self.histogram.merge(other.histogram)
+        if other.most_recent_error_epoch_ms is not None and (
+                self.most_recent_error_epoch_ms is None
+                or other.most_recent_error_epoch_ms > self.most_recent_error_epoch_ms):
+            self.most_recent_error_epoch_ms = other.most_recent_error_epoch_ms
+            self.most_recent_error = other.most_recent_error
+        return self
+
+    @property
+    def has_time_bounds(self):
+        return self.since_ms is not None or self.until_ms is not None
+
+    @property
+    def patterns(self):
+        return list(self.matcher.patterns) if self.matcher is not None else None
+
+    @property
+    def histogram_spec(self):
+        return (self.histogram.interval_ms, self.histogram.ring) if self.histogram is not None else None
+
+    def to_dict(self):
+        """Returns the summary as plain JSON-serialisable data."""
+        return {
+            "severity_level": self.severity_level,
+            "log_format": self.log_format,
+            "since_ms": self.since_ms,
+            "until_ms": self.until_ms,
+            "total_logs": self.total_logs,
+            "filtered": self.filtered,
+            "level_counts": dict(self.level_counts),
+            "most_recent_error": self.most_recent_error,
+            "most_recent_error_epoch_ms": self.most_recent_error_epoch_ms,
+            "error_templates": self.error_templates.to_list(),
+            "patterns": self.patterns,
+            "pattern_hits": self.pattern_hits,
+            "invalid": self.invalid.to_dict(),
+            "histogram": self.histogram.to_dict() if self.histogram is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data, reject_file=None):
+        """Rebuilds a summary saved with to_dict()."""
+        patterns = data.get("patterns")
+        matcher = AhoCorasick(patterns) if patterns is not None else None
+        summary = cls(data["severity_level"], data.get("since_ms"), data.get("until_ms"), matcher, reject_file,
+                      data.get("log_format", "default"))
+        summary.total_logs = data["total_logs"]
+        summary.filtered = data.get("filtered", 0)
+        summary.level_counts.update(data["level_counts"])
+        summary.most_recent_error = data["most_recent_error"]
+        summary.most_recent_error_epoch_ms = data["most_recent_error_epoch_ms"]
+        summary.error_templates = TopKCounter.from_list(data["error_templates"])
+        summary.pattern_hits = list(data.get("pattern_hits", []))
+        if "invalid" in data:
+            summary.invalid = InvalidLines.from_dict(data["invalid"], reject_file, summary.log_format)
+        if data.get("histogram") is not None:
+            summary.histogram = LevelHistogram.from_dict(data["histogram"])
+        return summary
+
+
+def aggregate_logs(raw_lines, severity_level=None, on_entry=None, matcher=None, reject_file=None,
+                   log_format="default", histogram_interval_ms=None):
+    """Parses and aggregates raw log lines in a single pass.
+
+    `on_entry` is called for every entry that passes the level filter, which lets callers
+    stream a filtered view (e.g. debug output) without keeping the entries around.
+    """
+    summary = LogSummary(severity_level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                         histogram_interval_ms=histogram_interval_ms)
+    return summary.consume(raw_lines, on_entry)
+
+
+# ---------------------------
+# Log Formats
+# ---------------------------
+# Every format compiles to a parse function returning (timestamp, level, message) in the default
+# format's terms -- a UTC 'YYYY-MM-DD HH:MM:SS,mmm' timestamp and one of LOG_LEVELS -- or None, so
+# everything downstream of the parser is format-agnostic.
+LEVEL_ALIASES = {
+    "trace": "INFO", "debug": "INFO", "info": "INFO", "notice": "INFO",
+    "warn": "WARNING", "warning": "WARNING",
+    "err": "ERROR", "error": "ERROR",
+    "crit": "CRITICAL", "critical": "CRITICAL", "alert": "CRITICAL", "emerg": "CRITICAL",
+    "fatal": "CRITICAL", "panic": "CRITICAL",
+}
+# syslog severity (PRI & 7) to level
+SYSLOG_SEVERITY_LEVELS = ("CRITICAL", "CRITICAL", "CRITICAL", "ERROR", "WARNING", "INFO", "INFO", "INFO")
+MONTH_NUMBERS = {name: f"{number:02d}" for number, name in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+_ISO_TIMESTAMP_PATTERN = re.compile(r'(\d{4}-\d\d-\d\d)[T ](\d\d:\d\d:\d\d)(?:[.,](\d+))?(Z|[+-]\d\d:?\d\d)?')
+
+
+def _utc_timestamp(date, clock, fraction="", offset=None):
+    """Builds 'YYYY-MM-DD HH:MM:SS,mmm' from parts; a non-UTC '+HH:MM'/'+HHMM' offset is applied.
+
+    Returns None for an impossible date or time (e.g. Feb 30), so the line counts as invalid.
+    """
+    timestamp = f"{date} {clock},{(fraction or '')[:3].ljust(3, '0')}"
+    try:
+        epoch_ms = timestamp_to_epoch_ms(timestamp)
+    except ValueError:
+        return None
+    if offset and offset not in ("Z", "+00:00", "+0000", "-00:00", "-0000"):
+        sign = 1 if offset[0] == "+" else -1
+        minutes = int(offset[1:3]) * 60 + int(offset[-2:])
+        return epoch_ms_to_timestamp(epoch_ms - sign * minutes * 60_000)
+    return timestamp
+
+
+def iso_to_timestamp(text):
+    """Converts an ISO 8601 timestamp ('2024-03-01T10:00:00.123+02:00', '... 10:00:00,123Z') to UTC form."""
+    match = _ISO_TIMESTAMP_PATTERN.fullmatch(text)
+    return _utc_timestamp(*match.groups()) if match else None
+
+
+def _build_default_parser():
+    """YYYY-MM-DD HH:MM:SS,mmm LEVEL message"""
+    return parse_log_fields
+
+
+def _build_nginx_access_parser():
+    """nginx/Apache common or combined access log; 5xx is ERROR, 4xx WARNING, the rest INFO"""
+    match = re.compile(r'(\S+) \S+ \S+ \[(\d\d)/(\w{3})/(\d{4}):(\d\d:\d\d:\d\d)(?:\.(\d+))? ([+-]\d{4})\] '
+                       r'"([^"]*)" (\d{3}) ').match
+    months = MONTH_NUMBERS
+
+    def parse_nginx_access(line):
+        found = match(line)
+        if found is None:
+            return None
+        client, day, month, year, clock, fraction, offset, request, status = found.groups()
+        if month not in months:
+            return None
+        timestamp = _utc_timestamp(f"{year}-{months[month]}-{day}", clock, fraction, offset)
+        if timestamp is None:
+            return None
+        level = "ERROR" if status[0] == "5" else "WARNING" if status[0] == "4" else "INFO"
+        return timestamp, level, f'{status} "{request}" {client}'
+    return parse_nginx_access
+
+
+def _build_nginx_error_parser():
+    """nginx error log: YYYY/MM/DD HH:MM:SS [level] pid#tid: *cid message"""
+    match = re.compile(r'(\d{4})/(\d\d)/(\d\d) (\d\d:\d\d:\d\d) \[(\w+)\] \d+#\d+: (?:\*\d+ )?(.+)', re.DOTALL).match
+    aliases = LEVEL_ALIASES
+
+    def parse_nginx_error(line):
+        found = match(line)
+        if found is None:
+            return None
+        year, month, day, clock, level, message = found.groups()
+        level = aliases.get(level)
+        timestamp = _utc_timestamp(f"{year}-{month}-{day}", clock)
+        if level is None or timestamp is None:
+            return None
+        return timestamp, level, message
+    return parse_nginx_error
+
+
+def _build_syslog_parser():
+    """syslog, RFC 3164 or RFC 5424 timestamps; level from PRI, else from an error/warning keyword
+
+    RFC 3164 ('Mar  1 10:00:00 host app[1]: msg') has no year, so the current one is assumed.
+    """
+    match = re.compile(r'(?:<(\d{1,3})>(?:1 )?)?'
+                       r'(?:(\w{3}) ([ \d]\d) (\d\d:\d\d:\d\d)'
+                       r'|(\d{4}-\d\d-\d\d)T(\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)?) '
+                       r'(\S+) (.+)', re.DOTALL).match
+    keyword = re.compile(r'\b(emerg|alert|crit(?:ical)?|fatal|panic|err(?:or)?|warn(?:ing)?)\b', re.IGNORECASE).search
+    aliases = LEVEL_ALIASES
+    months = MONTH_NUMBERS
+    year = datetime.now(timezone.utc).year
+
+    def parse_syslog(line):
+        found = match(line)
+        if found is None:
+            return None
+        pri, month, day, clock, date, iso_clock, fraction, offset, host, message = found.groups()
+        if date is not None:
+            timestamp = _utc_timestamp(date, iso_clock, fraction, offset)
+        elif month in months:
+            timestamp = _utc_timestamp(f"{year}-{months[month]}-{day.replace(' ', '0')}", clock)
+        else:
+            return None
+        if timestamp is None:
+            return None
+        if pri is not None:
+            level = SYSLOG_SEVERITY_LEVELS[int(pri) & 7]
+        else:
+            severity = keyword(message, 0, 120)
+            level = aliases[severity.group(1).lower()] if severity else "INFO"
+        return timestamp, level, f"{host} {message}"
+    return parse_syslog
+
+
+def _build_jsonl_parser():
+    """JSON lines with timestamp/time/ts/@timestamp, level/severity/lvl and message/msg keys"""
+    # json.loads() is C code: it measured faster than locating just the wanted keys with
+    # str.find() and decoding only their values in Python.
+    timestamp_keys = ("timestamp", "time", "ts", "@timestamp")
+    level_keys = ("level", "severity", "lvl", "levelname")
+    message_keys = ("message", "msg")
+    loads = json.loads
+    aliases = LEVEL_ALIASES
+
+    def first_of(record, keys):
+        for key in keys:
+            value = record.get(key)
+            if value is not None:
+                return value
+        return None
+
+    def parse_jsonl(line):
+        if not line.startswith("{"):
+            return None
+        try:
+            record = loads(line)
+        except ValueError:
+            return None
+        if not isinstance(record, dict):
+            return None
+
+        level = first_of(record, level_keys)
+        level = aliases.get(level.lower()) if isinstance(level, str) else None
+        if level is None:
+            return None
+
+        value = first_of(record, timestamp_keys)
+        if isinstance(value, str):
+            timestamp = iso_to_timestamp(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value < 1e14:
+            # Seconds or milliseconds since the epoch; 1e11 s is the year 5138
+            timestamp = epoch_ms_to_timestamp(round(value if value >= 1e11 else value * 1000))
+        else:
+            timestamp = None
+        if timestamp is None:
+            return None
+
+        message = first_of(record, message_keys)
+        return timestamp, level, str(message) if message not in (None, "") else "-"
+    return parse_jsonl
+
+
+# Format name -> builder of its parse function; the builder's docstring is its --format help.
+# Register further formats here; they are tried in this order by detect_log_format().
+LOG_FORMATS = {
+    "default": _build_default_parser,
+    "jsonl": _build_jsonl_parser,
+    "nginx": _build_nginx_access_parser,
+    "nginx-error": _build_nginx_error_parser,
+    "syslog": _build_syslog_parser,
+}
+_COMPILED_FORMATS = {}
+FORMAT_SNIFF_BYTES = 8192
+
+
+def compile_log_format(name):
+    """Returns the parse function of a registered format, building it on first use."""
+    parse = _COMPILED_FORMATS.get(name)
+    if parse is None:
+        parse = _COMPILED_FORMATS[name] = LOG_FORMATS[name]()
+    return parse
+
+
+def detect_log_format(file_path, sniff_bytes=FORMAT_SNIFF_BYTES):
+    """Guesses the format of a log from its first few KB: the registered format that parses the most lines.
+
+    Ties go to the earlier format in LOG_FORMATS, and 'default' is returned if nothing parses.
+    """
+    with open_log_file(file_path) as file:
+        sample = file.read(sniff_bytes)
+    lines = [line.strip() for line in sample.splitlines()]
+    if len(sample) >= sniff_bytes and len(lines) > 1:
+        lines.pop()  # Probably cut off
+    lines = [line for line in lines if line]
+
+    best, best_count = "default", 0
+    for name in LOG_FORMATS:
+        parse = compile_log_format(name)
+        count = sum(1 for line in lines if parse(line) is not None)
+        if count > best_count:
+            best, best_count = name, count
+    return best
+
+
+# ---------------------------
+# Memory-Mapped Mode
+# ---------------------------
+# Matches a whole well-formed line in raw bytes. The message must end in a printable ASCII character
+# followed only by spaces/tabs and an optional CR, i.e. exactly the lines that str.strip() plus
+# LOG_LINE_PATTERN would accept unchanged; anything else takes the exact decoded path instead.
+LOG_LINE_BYTES_PATTERN = re.compile(
+    rb'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3} (?:(INFO)|(WARNING)|(ERROR)|(CRITICAL)) [^\r\n]*[!-~][ \t\f\v]*\r?$',
+    re.MULTILINE)
+
+
+def _decode_lines(chunk):
+    """Decodes a bytes chunk into stripped lines, splitting on newlines the way text mode does."""
+    lines = chunk.decode().replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    if not lines[-1]:
+        lines.pop()
+    return [line.strip() for line in lines]
+
+
+def consume_log_buffer(summary, buffer, start, end, on_entry=None):
+    """Aggregates the newline-aligned byte range [start, end) of a bytes-like buffer.
+
+    Well-formed lines are matched and counted straight from the buffer without decoding. Only
+    lines whose text is actually reported (ERROR and CRITICAL, or everything in debug mode) and lines the
+    bytes pattern rejects are decoded and handed to the regular str parser.
+    """
+    if summary.parse_fields is not parse_log_fields:
+        # The bytes pattern only knows the default format
+        return summary.consume(_decode_lines(buffer[start:end]), on_entry)
+
+    # ERROR (3) and CRITICAL (4) text feeds the most recent ERROR and the message templates
+    decoded_groups = {group for group in (3, 4) if summary.severity_level in (None, LOG_LEVELS[group - 1])}
+    # Time bounds need every line's timestamp and pattern matching every message, so those go through the decoded path
+    exact = on_entry is not None or summary.has_time_bounds or summary.matcher is not None
+    # Lines counted here still need their time bucket; the timestamp is the first 23 bytes
+    histogram_add = summary.histogram.add if summary.histogram is not None else None
+    counts = [0] * (len(LOG_LEVELS) + 1)
+    position = start
+    for match in LOG_LINE_BYTES_PATTERN.finditer(buffer, start, end):
+        line_start, line_end = match.span()
+        if line_start != position:
+            summary.consume(_decode_lines(buffer[position:line_start]), on_entry)
+        position = line_end + 1
+
+        group = match.lastindex
+        if exact or group in decoded_groups:
+            summary.consume((buffer[line_start:line_end].decode().strip(),), on_entry)
+        else:
+            counts[group] += 1
+            if histogram_add is not None and summary.severity_level in (None, LOG_LEVELS[group - 1]):
+                histogram_add(buffer[line_start:line_start + 23].decode(), LOG_LEVELS[group - 1])
+    if position < end:
+        summary.consume(_decode_lines(buffer[position:end]), on_entry)
+
+    for level, count in zip(LOG_LEVELS, counts[1:]):
+        if count and summary.severity_level in (None, level):
+            summary.total_logs += count
+            summary.level_counts[level] += count
+        elif count:
+            summary.filtered += count
+    return summary
+
+
+def aggregate_logs_mmap(file_path, severity_level=None, on_entry=None, start=0, end=None, matcher=None,
+                        reject_file=None, log_format="default", histogram_interval_ms=None):
+    """Memory-maps the log file and aggregates it (or a newline-aligned byte range of it).
+
+    Compressed logs cannot be mapped and are streamed through read_log_file() instead.
+    """
+    summary = LogSummary(severity_level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                         histogram_interval_ms=histogram_interval_ms)
+    try:
+        if detect_compression(file_path):
+            return summary.consume(read_log_file(file_path), on_entry)
+        with open(file_path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return summary
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                consume_log_buffer(summary, buffer, start, len(buffer) if end is None else end, on_entry)
+    except FileNotFoundError:
+        print(f"Error: File {file_path} not found.")
+    return summary
+
+
+# ---------------------------
+# Parallel Mode
+# ---------------------------
+def split_file_ranges(file_path, parts):
+    """Splits a file into at most `parts` byte ranges, each starting at the beginning of a line."""
+    size = os.path.getsize(file_path)
+    boundaries = [0]
+    with open(file_path, "rb") as file:
+        for i in range(1, parts):
+            target = size * i // parts
+            if target <= boundaries[-1]:
+                continue
+            # Land on the byte after the next newline at or after target - 1
+            file.seek(target - 1)
+            file.readline()
+            position = file.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def read_log_range(file_path, start, end):
+    """Reads the lines of a newline-aligned byte range of the log file."""
+    with open(file_path, "rb") as file:
+        yield from _read_lines_between(file, start, end)
+
+
+def _read_lines_between(file, start, end):
+    file.seek(start)
+    position = start
+    while position < end:
+        raw = file.readline()
+        if not raw:
+            break
+        position += len(raw)
+        if b"\r" in raw:
+            yield from _decode_lines(raw)
+        else:
+            yield raw.decode().strip()
+
+
+REJECT_BUFFER_SIZE = 1 << 20
+
+
+def open_reject_file(path, append=False):
+    """Opens a file for rejected lines with a large write buffer, so rejects cost no syscall per line."""
+    return open(path, "a" if append else "w", buffering=REJECT_BUFFER_SIZE)
+
+
+@contextmanager
+def _reject_parts(reject_file, count):
+    """Yields one part-file path per pool task (all None without a reject file).
+
+    Tasks cannot share the parent's file object, so each writes its own part next to it, and the
+    parent appends the parts with _append_reject_part() as it merges. Leftovers are removed on exit.
+    """
+    if reject_file is None:
+        yield [None] * count
+        return
+    directory = os.path.dirname(os.path.abspath(reject_file.name))
+    with tempfile.TemporaryDirectory(prefix=".rejects-", dir=directory) as parts_directory:
+        yield [os.path.join(parts_directory, f"part{index}") for index in range(count)]
+
+
+def _append_reject_part(reject_file, part_path):
+    if part_path is not None and os.path.exists(part_path):
+        with open(part_path) as part:
+            shutil.copyfileobj(part, reject_file)
+        os.remove(part_path)
+
+
+def _aggregate_log_range(file_path, start, end, severity_level, use_mmap, keep_entries=False, matcher=None,
+                         reject_path=None, log_format="default", histogram_interval_ms=None):
+    """Process pool task: aggregates one byte range into a partial summary.
+
+    With `keep_entries` the entries that pass the filter are also returned, as a compact LogTable.
+    """
+    table = LogTable() if keep_entries else None
+    on_entry = table.add if keep_entries else None
+    with open_reject_file(reject_path) if reject_path else nullcontext() as reject_file:
+        if use_mmap:
+            summary = aggregate_logs_mmap(file_path, severity_level, on_entry, start, end, matcher, reject_file,
+                                          log_format, histogram_interval_ms)
+        else:
+            summary = aggregate_logs(read_log_range(file_path, start, end), severity_level, on_entry, matcher,
+                                     reject_file, log_format, histogram_interval_ms)
+    summary.invalid.reject_file = None
+    return summary, table
+
+
+def _replay(table, on_entry):
+    if table is not None and on_entry is not None:
+        for entry in table:
+            on_entry(entry)
+
+
+def aggregate_logs_parallel(file_path, workers, severity_level=None, use_mmap=False, on_entry=None, matcher=None,
+                            reject_file=None, log_format="default", histogram_interval_ms=None):
+    """Aggregates a log file across a process pool and merges the partial summaries.
+
+    Gzip files are split at member boundaries instead of line boundaries; other compressed
+    formats cannot be split and are decoded on one core. If `on_entry` is given, workers ship
+    their entries back as LogTables and they are replayed in file order.
+    """
+    summary = LogSummary(severity_level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                         histogram_interval_ms=histogram_interval_ms)
+    try:
+        compression = detect_compression(file_path)
+        if compression == "gzip":
+            return aggregate_gzip_parallel(file_path, workers, severity_level, on_entry, matcher, reject_file,
+                                           log_format, histogram_interval_ms)
+        if compression:
+            print(f"Notice: {compression} input cannot be split; decoding it on one core.")
+            return summary.consume(read_log_file(file_path), on_entry)
+        # A few ranges per worker keeps the pool busy when some ranges parse slower than others
+        ranges = split_file_ranges(file_path, workers * 4)
+    except FileNotFoundError:
+        print(f"Error: File {file_path} not found.")
+        return summary
+
+    with _reject_parts(reject_file, len(ranges)) as reject_paths, ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in submission order, so merging keeps the file's order for ties
+        partials = pool.map(_aggregate_log_range, [file_path] * len(ranges),
+                            [start for start, _ in ranges], [end for _, end in ranges],
+                            [severity_level] * len(ranges), [use_mmap] * len(ranges),
+                            [on_entry is not None] * len(ranges), [matcher] * len(ranges), reject_paths,
+                            [log_format] * len(ranges), [histogram_interval_ms] * len(ranges))
+        for (partial, table), reject_path in zip(partials, reject_paths):
+            summary.merge(partial)
+            _replay(table, on_entry)
+            _append_reject_part(reject_file, reject_path)
+    return summary
+
+
+def split_gzip_members(file_path, parts):
+    """Splits a multi-member gzip file into at most `parts` byte ranges that start at member headers.
+
+    Header candidates are found by their magic bytes (ID1 ID2 CM=deflate, no reserved flags). A
+    false candidate inside compressed data is caught later, when decoding from it fails.
+    """
+    size = os.path.getsize(file_path)
+    boundaries = [0]
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for i in range(1, parts):
+            position = max(size * i // parts, boundaries[-1] + 1)
+            while True:
+                position = buffer.find(b"\x1f\x8b\x08", position)
+                if position < 0 or not buffer[position + 3] & 0xE0:
+                    break
+                position += 1
+            if position < 0:
+                break
+            boundaries.append(position)
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def _decompress_gzip_members(file, start, end):
+    """Yields the decompressed data of the whole gzip members in [start, end).
+
+    Raises ValueError (or zlib.error) if the range does not start and end on member boundaries.
+    """
+    file.seek(start)
+    remaining = end - start
+    decompressor = zlib.decompressobj(31)
+    started = False
+    data = b""
+    while True:
+        if not data:
+            if remaining <= 0:
+                break
+            data = file.read(min(1 << 20, remaining))
+            remaining -= len(data)
+            if not data:
+                break
+        if decompressor.eof:
+            if not data.strip(b"\0") and remaining <= 0:
+                break  # Trailing zero padding after the last member
+            decompressor = zlib.decompressobj(31)
+            started = False
 
+        started = True
+        chunk = decompressor.decompress(data, 1 << 22)
+        data = decompressor.unused_data if decompressor.eof else decompressor.unconsumed_tail
+        if chunk:
+            yield chunk
+    if started and not decompressor.eof:
+        raise ValueError("byte range ends inside a gzip member")
 
-def write_summary_report(parsed_logs, level_counts, most_recent_error, output_file):
-    """Writes a summary report to the output file."""
-    total_logs = len(parsed_logs)
+
+def _aggregate_gzip_range(file_path, start, end, severity_level, keep_entries=False, matcher=None, reject_path=None,
+                          log_format="default", histogram_interval_ms=None):
+    """Process pool task: aggregates the lines inside a range of gzip members.
+
+    Lines may span member boundaries, so the bytes before the first newline and after the last
+    one are returned unparsed as (head, tail) for the parent to stitch to the neighbouring ranges.
+    tail is None if the range holds no newline at all.
+    """
+    summary = LogSummary(severity_level, matcher=matcher, log_format=log_format,
+                         histogram_interval_ms=histogram_interval_ms)
+    table = LogTable() if keep_entries else None
+    on_entry = table.add if keep_entries else None
+    head = None
+    pending = b""
+    with open(file_path, "rb") as file, \
+            open_reject_file(reject_path) if reject_path else nullcontext() as reject_file:
+        summary.invalid.reject_file = reject_file
+        for chunk in _decompress_gzip_members(file, start, end):
+            pending += chunk
+            if head is None:
+                first_newline = pending.find(b"\n")
+                if first_newline < 0:
+                    continue
+                head, pending = pending[:first_newline + 1], pending[first_newline + 1:]
+            last_newline = pending.rfind(b"\n")
+            if last_newline >= 0:
+                consume_log_buffer(summary, pending, 0, last_newline + 1, on_entry)
+                pending = pending[last_newline + 1:]
+    summary.invalid.reject_file = None
+    if head is None:
+        return summary, table, pending, None
+    return summary, table, head, pending
+
+
+def aggregate_gzip_parallel(file_path, workers, severity_level=None, on_entry=None, matcher=None, reject_file=None,
+                            log_format="default", histogram_interval_ms=None):
+    """Decodes the members of a multi-member gzip file (logrotate, pigz, cat *.gz) across a process pool."""
+    ranges = split_gzip_members(file_path, workers * 4)
+    summary = LogSummary(severity_level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                         histogram_interval_ms=histogram_interval_ms)
+    if len(ranges) < 2:
+        return summary.consume(read_log_file(file_path), on_entry)
+
+    with _reject_parts(reject_file, len(ranges)) as reject_paths:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                partials = list(pool.map(_aggregate_gzip_range, [file_path] * len(ranges),
+                                         [start for start, _ in ranges], [end for _, end in ranges],
+                                         [severity_level] * len(ranges), [on_entry is not None] * len(ranges),
+                                         [matcher] * len(ranges), reject_paths, [log_format] * len(ranges),
+                                         [histogram_interval_ms] * len(ranges)))
+        except (ValueError, zlib.error):
+            # A magic-byte match inside compressed data, not a real member header
+            return summary.consume(read_log_file(file_path), on_entry)
+
+        carry = b""
+        for (partial, table, head, tail), reject_path in zip(partials, reject_paths):
+            if tail is None:
+                carry += head
+                continue
+            summary.consume(_decode_lines(carry + head), on_entry)
+            summary.merge(partial)
+            _replay(table, on_entry)
+            _append_reject_part(reject_file, reject_path)
+            carry = tail
+        if carry:
+            summary.consume(_decode_lines(carry), on_entry)
+    return summary
+
+
+# ---------------------------
+# Multi-File Input
+# ---------------------------
+# Files in a log directory that are the analyzer's own sidecars, not logs
+_SIDECAR_SUFFIXES = (".idx", ".tmp")
+
+
+def expand_log_paths(patterns):
+    """Expands log arguments into file paths: directories to their files, globs to their matches.
+
+    Plain paths are passed through even if they do not exist, so the usual not-found error shows up.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(
+                entry.path for entry in os.scandir(pattern)
+                if entry.is_file() and not entry.name.startswith(".") and not entry.name.endswith(_SIDECAR_SUFFIXES)))
+        elif glob.has_magic(pattern):
+            matches = sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+            if not matches:
+                print(f"Error: No log files match {pattern}.")
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def _prefetch_parsed_lines(file_path, batches, batch_size=512, fold_lines=None, log_format="default"):
+    """Reader thread: parses a file and queues (epoch_ms, fields, line) batches for the merge.
+
+    Invalid lines carry the time of the last valid line so they keep their place in the stream.
+    """
+    try:
+        last_time = float("-inf")
+        batch = []
+        parse_fields = compile_log_format(log_format)
+        raw_lines = read_log_file(file_path)
+        for line in fold_lines(raw_lines) if fold_lines is not None else raw_lines:
+            fields = parse_fields(line)
+            if fields is not None:
+                try:
+                    last_time = timestamp_to_epoch_ms(fields[0])
+                except ValueError:
+                    pass
+            batch.append((last_time, fields, line))
+            if len(batch) >= batch_size:
+                batches.put(batch)
+                batch = []
+        if batch:
+            batches.put(batch)
+        batches.put(None)
+    except BaseException as e:
+        batches.put(e)
+
+
+def _iter_prefetched(batches):
+    while True:
+        batch = batches.get()
+        if batch is None:
+            return
+        if isinstance(batch, BaseException):
+            raise batch
+        yield from batch
+
+
+def merge_log_files(file_paths, fold_lines=None, log_format="default"):
+    """Reads several log files concurrently and yields (epoch_ms, fields, line) in timestamp order.
+
+    Each file is read and parsed by its own thread into a small bounded queue, and the streams are
+    combined with a heap-based k-way merge. heapq.merge is stable, so lines with equal timestamps
+    keep their file order and then the order of the arguments. `fold_lines` (e.g.
+    fold_continuation_lines) is applied to each file's lines before they are parsed.
+    """
+    streams = []
+    for file_path in file_paths:
+        batches = queue.Queue(maxsize=2)
+        threading.Thread(target=_prefetch_parsed_lines, args=(file_path, batches, 512, fold_lines, log_format),
+                         daemon=True).start()
+        streams.append(_iter_prefetched(batches))
+    return heapq.merge(*streams, key=itemgetter(0))
+
+
+def aggregate_log_files(file_paths, severity_level=None, on_entry=None, matcher=None, reject_file=None,
+                        fold_lines=None, log_format="default", histogram_interval_ms=None):
+    """Aggregates several log files as one time-ordered stream."""
+    summary = LogSummary(severity_level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                         histogram_interval_ms=histogram_interval_ms)
+    add_fields = summary.add_fields
+    add_invalid = summary.invalid.add
+    for _, fields, line in merge_log_files(file_paths, fold_lines, log_format):
+        if fields is None:
+            add_invalid(line)
+        elif add_fields(*fields) and on_entry is not None:
+            timestamp, level, message = fields
+            on_entry({"timestamp": timestamp, "level": level, "message": message})
+    return summary
+
+
+def _aggregate_whole_file(file_path, severity_level, use_mmap, keep_entries=False, matcher=None, reject_path=None,
+                          log_format="default", histogram_interval_ms=None):
+    """Process pool task: aggregates one complete file, optionally keeping its entries in a LogTable."""
+    table = LogTable() if keep_entries else None
+    on_entry = table.add if keep_entries else None
+    with open_reject_file(reject_path) if reject_path else nullcontext() as reject_file:
+        if use_mmap:
+            summary = aggregate_logs_mmap(file_path, severity_level, on_entry, matcher=matcher, reject_file=reject_file,
+                                          log_format=log_format, histogram_interval_ms=histogram_interval_ms)
+        else:
+            summary = aggregate_logs(read_log_file(file_path), severity_level, on_entry, matcher, reject_file,
+                                     log_format, histogram_interval_ms)
+    summary.invalid.reject_file = None
+    return summary, table
+
+
+def aggregate_log_files_parallel(file_paths, workers, severity_level=None, use_mmap=False, on_entry=None,
+                                 matcher=None, reject_file=None, log_format="default", histogram_interval_ms=None):
+    """Aggregates several log files, one per pool task, and merges the summaries in argument order.
+
+    Merging in argument order resolves equal ERROR timestamps the same way the k-way merge does.
+    With `on_entry`, the per-file LogTables are k-way merged by timestamp and replayed in order.
+    Rejected lines are written file by file, in argument order.
+    """
+    summary = LogSummary(severity_level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                         histogram_interval_ms=histogram_interval_ms)
+    tables = []
+    with _reject_parts(reject_file, len(file_paths)) as reject_paths, ProcessPoolExecutor(max_workers=workers) as pool:
+        partials = pool.map(_aggregate_whole_file, file_paths, [severity_level] * len(file_paths),
+                            [use_mmap] * len(file_paths), [on_entry is not None] * len(file_paths),
+                            [matcher] * len(file_paths), reject_paths, [log_format] * len(file_paths),
+                            [histogram_interval_ms] * len(file_paths))
+        for (partial, table), reject_path in zip(partials, reject_paths):
+            summary.merge(partial)
+            tables.append(table)
+            _append_reject_part(reject_file, reject_path)
+    if on_entry is not None:
+        for _, entry in heapq.merge(*(table.iter_timed() for table in tables), key=itemgetter(0)):
+            on_entry(entry)
+    return summary
+
+
+# ---------------------------
+# Incremental / Follow Mode
+# ---------------------------
+CHECKPOINT_VERSION = 2
+FINGERPRINT_SIZE = 1024  # Leading bytes hashed to recognise the same file after a restart
+
+
+def file_fingerprint(file, length):
+    """Returns (length, sha1) of the first `length` bytes of an open binary file."""
+    file.seek(0)
+    head = file.read(length)
+    return len(head), hashlib.sha1(head).hexdigest()
+
+
+def last_line_end(file, start, size):
+    """Returns the offset just past the last newline in [start, size) of an open binary file, or start if there is none."""
+    position = size
+    while position > start:
+        block_start = max(start, position - (1 << 16))
+        file.seek(block_start)
+        index = file.read(position - block_start).rfind(b"\n")
+        if index >= 0:
+            return block_start + index + 1
+        position = block_start
+    return start
+
+
+class LogFollower:
+    """Incrementally aggregates a growing log file, resuming from a byte offset saved in a checkpoint.
+
+    Only complete lines are consumed; a partially written last line is left for the next poll.
+    Rotation (the path now names a different file) and truncation (the file shrank or its head
+    changed) restart reading at byte 0 of the current file. The aggregates keep accumulating, so
+    the report covers everything read since the checkpoint was created.
+    """
+
+    def __init__(self, file_path, severity_level=None, checkpoint_path=None, use_mmap=False, on_entry=None,
+                 matcher=None, reject_file=None, log_format="default", histogram_interval_ms=None,
+                 histogram_buckets=None):
+        self.file_path = file_path
+        self.checkpoint_path = checkpoint_path
+        self.use_mmap = use_mmap
+        self.on_entry = on_entry
+        self.summary = LogSummary(severity_level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                                  histogram_interval_ms=histogram_interval_ms, histogram_buckets=histogram_buckets)
+        self.offset = 0
+        self.identity = None     # (st_dev, st_ino) of the file the offset refers to
+        self.fingerprint = None  # (length, sha1) of the file's first bytes
+        self._file = None
+        if checkpoint_path:
+            self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return
+
+        if state.get("version") != CHECKPOINT_VERSION or state.get("path") != os.path.abspath(self.file_path) \
+                or state.get("level") != self.summary.severity_level \
+                or state["summary"].get("patterns") != self.summary.patterns \
+                or state["summary"].get("log_format", "default") != self.summary.log_format \
+                or self._saved_histogram_spec(state["summary"]) != self.summary.histogram_spec:
+            print(f"Notice: Checkpoint {self.checkpoint_path} is for a different file, level, format, match file "
+                  "or histogram; starting over.")
+            return
+        self.offset = state["offset"]
+        self.identity = tuple(state["identity"])
+        self.fingerprint = tuple(state["fingerprint"])
+        self.summary = LogSummary.from_dict(state["summary"], self.summary.invalid.reject_file)
+
+    @staticmethod
+    def _saved_histogram_spec(saved_summary):
+        histogram = saved_summary.get("histogram")
+        return (histogram["interval_ms"], histogram["ring"]) if histogram is not None else None
+
+    def save_checkpoint(self):
+        """Atomically writes the offset and partial aggregates to the checkpoint file."""
+        if self.summary.invalid.reject_file is not None:
+            # Rejected lines up to the saved offset must not be lost if the process dies
+            self.summary.invalid.reject_file.flush()
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "path": os.path.abspath(self.file_path),
+            "level": self.summary.severity_level,
+            "offset": self.offset,
+            "identity": self.identity,
+            "fingerprint": self.fingerprint,
+            "summary": self.summary.to_dict(),
+        }
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def poll(self):
+        """Aggregates the complete lines appended since the last poll. Returns the bytes consumed."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            # Rotated away and not recreated yet: finish whatever the old file still holds
+            return self._consume_available() if self._file else 0
+
+        consumed = 0
+        if self._file is not None and (stat.st_dev, stat.st_ino) != self.identity:
+            consumed += self._consume_available()
+            self.close()
+        if self._file is None:
+            self._file = open(self.file_path, "rb")
+            self._check_same_file()
+        return consumed + self._consume_available()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def skip_to_end(self):
+        """Starts after the file's last complete line, so only lines appended from now on are read."""
+        try:
+            self._file = open(self.file_path, "rb")
+        except FileNotFoundError:
+            return  # Read from the start once it appears
+        self._check_same_file()
+        self.offset = self._last_line_end(os.fstat(self._file.fileno()).st_size)
+        self.fingerprint = file_fingerprint(self._file, min(self.offset, FINGERPRINT_SIZE))
+
+    def _check_same_file(self):
+        """Restarts at byte 0 if the opened file is not the one the saved offset refers to."""
+        stat = os.fstat(self._file.fileno())
+        identity = (stat.st_dev, stat.st_ino)
+        if self.identity is not None:
+            if identity != self.identity:
+                print(f"Notice: {self.file_path} was rotated; reading the new file from the start.")
+                self._restart()
+            elif stat.st_size < self.offset or file_fingerprint(self._file, self.fingerprint[0]) != self.fingerprint:
+                print(f"Notice: {self.file_path} was truncated; reading it again from the start.")
+                self._restart()
+        self.identity = identity
+
+    def _restart(self):
+        self.offset = 0
+        self.fingerprint = None
+
+    def _consume_available(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.offset:
+            # Truncated in place (copytruncate) while we held it open
+            print(f"Notice: {self.file_path} was truncated; reading it again from the start.")
+            self._restart()
+        end = self._last_line_end(size)
+        if end <= self.offset:
+            return 0
+
+        if self.use_mmap:
+            with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                consume_log_buffer(self.summary, buffer, self.offset, end, self.on_entry)
+        else:
+            self.summary.consume(_read_lines_between(self._file, self.offset, end), self.on_entry)
+
+        consumed = end - self.offset
+        self.offset = end
+        if self.fingerprint is None or self.fingerprint[0] < min(end, FINGERPRINT_SIZE):
+            self.fingerprint = file_fingerprint(self._file, min(end, FINGERPRINT_SIZE))
+        return consumed
+
+    def _last_line_end(self, size):
+        return last_line_end(self._file, self.offset, size)
+
+
+def run_incremental(follower, output_file, follow=False, interval=1.0, top_k=10, histogram_format="csv",
+                    summary_json=None):
+    """Consumes new lines, rewrites the report and saves the checkpoint; with `follow`, keeps polling.
+
+    Returns the number of bytes consumed.
+    """
+    if not follow and not os.path.exists(follower.file_path):
+        print(f"Error: File {follower.file_path} not found.")
+
+    total_consumed = 0
+    try:
+        consumed = follower.poll()
+        while True:
+            total_consumed += consumed
+            if consumed or not follow:
+                write_summary_report(follower.summary, output_file, top_k)
+                if follower.summary.histogram is not None:
+                    write_histogram(follower.summary.histogram, histogram_path(output_file, histogram_format),
+                                    histogram_format)
+                if summary_json:
+                    save_summary(follower.summary, summary_json)
+                if follower.checkpoint_path:
+                    follower.save_checkpoint()
+            if not follow:
+                break
+            time.sleep(interval)
+            consumed = follower.poll()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+    return total_consumed
+
+
+# ---------------------------
+# Time Index & Range Queries
+# ---------------------------
+TIME_INDEX_VERSION = 1
+# First timestamp on a physical line. Deliberately looser than LOG_LINE_PATTERN: stray timestamps
+# on invalid lines only widen the region a query reads, never narrow it.
+LINE_TIMESTAMP_BYTES_PATTERN = re.compile(rb'(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) (?:INFO|WARNING|ERROR|CRITICAL) ')
+
+
+def parse_time_bound(text):
+    """argparse type for --since/--until: 'YYYY-MM-DD[ HH:MM[:SS[,mmm]]]' to epoch milliseconds."""
+    template = "1970-01-01 00:00:00,000"
+    padded = text + template[len(text):]
+    if len(text) not in (10, 16, 19, 23) or not re.fullmatch(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}", padded):
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD[ HH:MM[:SS[,mmm]]], got {text!r}")
+    try:
+        return timestamp_to_epoch_ms(padded)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+class TimeIndex:
+    """Sparse sidecar index mapping every Nth line's byte offset to time bounds, for range queries.
+
+    For each sample k it keeps the sample's offset, the latest timestamp on any line before it
+    (`prefix_max`) and the earliest timestamp between it and the next sample (`block_min`). Both
+    bounds stay correct for slightly out-of-order logs, so a query can binary-search its start
+    and stop offsets and parse only the lines in between.
+
+    The index remembers how far it has read plus a fingerprint of the log's head: when the log
+    grows it is extended from there, when the log is truncated or replaced it is rebuilt.
+    """
+
+    def __init__(self, log_path, every=1000):
+        self.log_path = log_path
+        self.every = every
+        self._reset()
+
+    def _reset(self):
+        self.fingerprint = None
+        self.end = 0                  # Offset just past the last indexed line
+        self.lines_since_sample = 0
+        self.max_epoch_ms = None      # Latest timestamp in [0, end)
+        self.offsets = []
+        self.prefix_max = []
+        self.block_min = []
+
+    @property
+    def index_path(self):
+        return f"{self.log_path}.idx"
+
+    def load(self):
+        try:
+            with open(self.index_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Warning: Rebuilding unreadable index {self.index_path}: {e}")
+            return
+        if state.get("version") != TIME_INDEX_VERSION or state.get("every") != self.every:
+            return
+        self.fingerprint = tuple(state["fingerprint"])
+        self.end = state["end"]
+        self.lines_since_sample = state["lines_since_sample"]
+        self.max_epoch_ms = state["max_epoch_ms"]
+        self.offsets = state["offsets"]
+        self.prefix_max = state["prefix_max"]
+        self.block_min = state["block_min"]
+
+    def save(self):
+        state = {
+            "version": TIME_INDEX_VERSION,
+            "every": self.every,
+            "fingerprint": self.fingerprint,
+            "end": self.end,
+            "lines_since_sample": self.lines_since_sample,
+            "max_epoch_ms": self.max_epoch_ms,
+            "offsets": self.offsets,
+            "prefix_max": self.prefix_max,
+            "block_min": self.block_min,
+        }
+        temp_path = f"{self.index_path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Warning: Could not save time index {self.index_path}: {e}")
+
+    def update(self, file):
+        """Brings the index up to date with an open binary log file. Returns True if it changed."""
+        size = os.fstat(file.fileno()).st_size
+        if self.fingerprint is not None and (
+                size < self.end or file_fingerprint(file, self.fingerprint[0]) != self.fingerprint):
+            self._reset()
+        if size == self.end:
+            return False
+
+        file.seek(self.end)
+        position = self.end
+        latest = self.max_epoch_ms
+        for raw in file:
+            if not raw.endswith(b"\n"):
+                break  # Partially written line; index it once it is complete
+            if self.lines_since_sample == 0 or self.lines_since_sample >= self.every:
+                self.offsets.append(position)
+                self.prefix_max.append(latest)
+                self.block_min.append(None)
+                self.lines_since_sample = 0
+            self.lines_since_sample += 1
+            position += len(raw)
+
+            for segment in raw.split(b"\r") if b"\r" in raw else (raw,):
+                match = LINE_TIMESTAMP_BYTES_PATTERN.search(segment)
+                if match is None:
+                    continue
+                try:
+                    epoch_ms = timestamp_to_epoch_ms(match.group(1).decode())
+                except ValueError:
+                    continue
+                if latest is None or epoch_ms > latest:
+                    latest = epoch_ms
+                if self.block_min[-1] is None or epoch_ms < self.block_min[-1]:
+                    self.block_min[-1] = epoch_ms
+
+        changed = position != self.end
+        self.end = position
+        self.max_epoch_ms = latest
+        self.fingerprint = file_fingerprint(file, min(self.end, FINGERPRINT_SIZE))
+        return changed
+
+    def locate(self, since_ms=None, until_ms=None):
+        """Returns (start, stop) offsets of the sample-aligned region that can hold matching lines.
+
+        `stop` is None when the region runs to the end of the file.
+        """
+        start = 0
+        if since_ms is not None and self.offsets:
+            # Last sample whose preceding lines are all older than since_ms
+            k = bisect.bisect_left(self.prefix_max, since_ms, key=lambda t: float("-inf") if t is None else t)
+            start = self.offsets[max(k - 1, 0)]
+
+        stop = None
+        if until_ms is not None:
+            # First sample from which every indexed line is at or after until_ms
+            for k in range(len(self.offsets) - 1, -1, -1):
+                if self.block_min[k] is not None and self.block_min[k] < until_ms:
+                    break
+                stop = self.offsets[k]
+            if stop is not None and stop < start:
+                stop = start
+        return start, stop
+
+    def regions(self, since_ms, until_ms, size):
+        """Byte ranges of a `size`-byte log that a range query has to read."""
+        start, stop = self.locate(since_ms, until_ms)
+        if stop is None:
+            return [(start, size)]
+        # A partial last line was not indexed, so its time is unknown: read it as well
+        return [(start, stop), (max(self.end, stop), size)]
+
+
+def aggregate_time_range(file_path, since_ms=None, until_ms=None, severity_level=None, use_mmap=False,
+                         on_entry=None, index_every=1000, matcher=None, reject_file=None, fold_lines=None,
+                         log_format="default", histogram_interval_ms=None):
+    """Aggregates only the entries in [since_ms, until_ms), reading just the region the time index points to.
+
+    The time index only understands the default format; other formats are filtered in one full scan.
+    """
+    summary = LogSummary(severity_level, since_ms, until_ms, matcher, reject_file, log_format, histogram_interval_ms)
+    if log_format != "default":
+        return summary.consume(read_log_file(file_path), on_entry)
+    index = TimeIndex(file_path, index_every)
+    index.load()
+    try:
+        with open(file_path, "rb") as file:
+            if index.update(file):
+                index.save()
+            for range_start, range_end in index.regions(since_ms, until_ms, os.fstat(file.fileno()).st_size):
+                if range_end <= range_start:
+                    continue
+                if use_mmap:
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                        consume_log_buffer(summary, buffer, range_start, range_end, on_entry)
+                else:
+                    raw_lines = _read_lines_between(file, range_start, range_end)
+                    if fold_lines is not None:
+                        raw_lines = fold_lines(raw_lines)
+                    summary.consume(raw_lines, on_entry)
+    except FileNotFoundError:
+        print(f"Error: File {file_path} not found.")
+    return summary
+
+
+def time_range_bytes(file_path, since_ms=None, until_ms=None, index_every=1000):
+    """Bytes of the log that aggregate_time_range() read for the same query, from the index it left behind."""
+    index = TimeIndex(file_path, index_every)
+    index.load()
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return 0
+    return sum(max(0, end - start) for start, end in index.regions(since_ms, until_ms, size))
+
+
+def write_summary_report(summary, output_file, top_k=10):
+    """Writes a summary report to the output file, including the `top_k` most frequent error templates."""
+    level_counts = summary.level_counts
     with open(output_file, "w") as f:
         f.write("Log Summary Report\n")
         f.write("----------------------\n")
-        f.write(f"Total Logs Processed: {total_logs}\n")
-        f.write(f"INFO: {level_counts.get('INFO', 0)}\n")
-        f.write(f"WARNING: {level_counts.get('WARNING', 0)}\n")
-        f.write(f"ERROR: {level_counts.get('ERROR', 0)}\n")
-        f.write(f"CRITICAL: {level_counts.get('CRITICAL', 0)}\n")
+        f.write(f"Total Logs Processed: {summary.total_logs}\n")
+        for level in LOG_LEVELS:
+            f.write(f"{level}: {level_counts.get(level, 0)}\n")
 
+        most_recent_error = summary.most_recent_error
         if most_recent_error:
             time = most_recent_error["timestamp"]
             msg = most_recent_error["message"]
@@ -75,34 +1979,978 @@ def write_summary_report(parsed_logs, level_counts, most_recent_error, output_fi
         else:
             f.write("Most Recent ERROR: None\n")
 
+        if summary.matcher is not None:
+            f.write("Pattern Matches (entries):\n")
+            for pattern, hits in zip(summary.matcher.patterns, summary.pattern_hits):
+                f.write(f"  {hits}: {pattern}\n")
+
+        if top_k:
+            f.write(f"Top ERROR/CRITICAL Templates (of {len(summary.error_templates)} tracked):\n")
+            for template, count, error in summary.error_templates.most_common(top_k):
+                bound = f" (at most {error} over)" if error else ""
+                f.write(f"  {count}{bound}: {template}\n")
+
+        invalid = summary.invalid
+        if invalid.total:
+            f.write(f"Invalid Lines Skipped: {invalid.total}\n")
+            for reason, count in invalid.counts.most_common():
+                f.write(f"  {reason}: {count}\n")
+            for sample in invalid.samples:
+                f.write(f"  sample: {sample!r}\n")
+
     print(f"Summary report successfully written to {output_file}\n")
 
 
+def histogram_path(output_file, histogram_format):
+    """The histogram is written next to the report: log_summary.txt -> log_summary.histogram.csv."""
+    return f"{os.path.splitext(output_file)[0]}.histogram.{histogram_format}"
+
+
+def write_histogram(histogram, output_file, histogram_format="csv"):
+    """Writes per-bucket level counts, every bucket from the first to the last (empty ones included), as CSV or JSON."""
+    rows = [(epoch_ms_to_timestamp(start), start, counts) for start, counts in histogram.rows()]
+    with open(output_file, "w", newline="") as f:
+        if histogram_format == "json":
+            json.dump({
+                "interval_ms": histogram.interval_ms,
+                "dropped": histogram.dropped,
+                "buckets": [{"start": timestamp, "epoch_ms": start, **dict(zip(LOG_LEVELS, counts))}
+                            for timestamp, start, counts in rows],
+            }, f)
+            f.write("\n")
+        else:
+            writer = csv.writer(f)
+            writer.writerow(["start", "epoch_ms", *LOG_LEVELS])
+            for timestamp, start, counts in rows:
+                writer.writerow([timestamp, start, *counts])
+    print(f"Histogram successfully written to {output_file}\n")
+
+
+# ---------------------------
+# Run Statistics (--stats / --profile)
+# ---------------------------
+def peak_rss_bytes(children=False):
+    """Peak resident set size of this process (or the largest of its finished children), or None if unknown."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+class RunStats:
+    """Wall time of each phase of a run, for --stats.
+
+    Reading, parsing, filtering, counting and tracking the latest ERROR happen in one streaming
+    pass per line, so they are timed together as "aggregate"; per-line timers would cost more than
+    the parsing itself. --profile splits that phase up by function instead.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._lap_started = time.perf_counter()
+
+    def lap(self, name):
+        """Charges the time since the previous lap (or since creation) to phase `name`."""
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._lap_started
+        self._lap_started = now
+
+    def describe(self, summary, input_bytes, workers=False, lines_before=0):
+        """Returns the --stats lines for a finished run that read `input_bytes` bytes of (on-disk) input.
+
+        `lines_before` is how many of the summary's lines a checkpoint had already counted.
+        """
+        lines_read = summary.total_logs + summary.filtered + summary.invalid.total - lines_before
+        seconds = self.phases.get("aggregate", 0.0)
+        per_second = 1 / seconds if seconds > 0 else 0.0
+        lines_counted = lines_read + lines_before
+        failure_rate = summary.invalid.total / lines_counted if lines_counted else 0.0
+        described = [
+            f"Input: {input_bytes / 1e6:.1f} MB, {lines_read} lines",
+            f"Throughput: {input_bytes * per_second / 1e6:.1f} MB/s, {lines_read * per_second:,.0f} lines/s",
+            f"Parse failures: {summary.invalid.total} ({failure_rate:.2%})",
+            f"Filtered out: {summary.filtered}",
+        ]
+        peak = peak_rss_bytes()
+        if peak is not None:
+            workers_peak = peak_rss_bytes(children=True) if workers else None
+            described.append(f"Peak RSS: {peak / 2**20:.1f} MiB"
+                             + (f" (largest worker: {workers_peak / 2**20:.1f} MiB)" if workers_peak else ""))
+        described.append("Phases: " + ", ".join(f"{name} {elapsed:.3f}s" for name, elapsed in self.phases.items()))
+        return described
+
+
+def print_profile(profiler, path, limit=20):
+    """Saves cProfile data to `path` (readable with pstats or snakeviz) and prints the costliest functions."""
+    profiler.dump_stats(path)
+    print(f"Profile written to {path}; top {limit} functions by own time:")
+    pstats.Stats(profiler).sort_stats("tottime").print_stats(limit)
+
+
+# ---------------------------
+# Summary Files & Merging
+# ---------------------------
+SUMMARY_FORMAT = "devops-log-summary"
+SUMMARY_VERSION = 1
+
+
+def save_summary(summary, path):
+    """Writes the summary as compact, versioned JSON (gzip-compressed if `path` ends in .gz)."""
+    data = {"format": SUMMARY_FORMAT, "version": SUMMARY_VERSION, "summary": summary.to_dict()}
+    opener = gzip.open if path.endswith(".gz") else open
+    temp_path = f"{path}.tmp"
+    with opener(temp_path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def load_summary(path):
+    """Reads a summary written by save_summary(). Raises ValueError for any other file or version."""
+    try:
+        with open_log_file(path) as f:
+            data = json.load(f)
+    except ValueError:  # Not JSON, or not text at all
+        data = None
+    if not isinstance(data, dict) or data.get("format") != SUMMARY_FORMAT:
+        raise ValueError(f"{path} is not a summary file")
+    if data.get("version") != SUMMARY_VERSION:
+        raise ValueError(f"{path} has summary version {data.get('version')}, expected {SUMMARY_VERSION}")
+    return LogSummary.from_dict(data["summary"])
+
+
+def merge_summaries(summaries):
+    """Merges summaries in order into the first one.
+
+    Merging is associative, so hosts can be merged in any grouping: (a + b) + c == a + (b + c), up
+    to the approximation of the top templates. Raises ValueError if the summaries were made with a
+    different level filter, time range, match file or histogram interval, whose counts do not add up.
+    """
+    merged = None
+    for summary in summaries:
+        if merged is None:
+            merged = summary
+            continue
+        for setting in ("severity_level", "since_ms", "until_ms", "patterns"):
+            if getattr(summary, setting) != getattr(merged, setting):
+                raise ValueError(f"summaries were made with different {setting} settings")
+        if (summary.histogram is None) != (merged.histogram is None) or \
+                summary.histogram is not None and summary.histogram.interval_ms != merged.histogram.interval_ms:
+            raise ValueError("summaries were made with different histogram intervals")
+        merged.merge(summary)
+    return merged
+
+
+def merge_main(argv):
+    parser = argparse.ArgumentParser(prog="merge",
+                                     description="Merge summaries written with --summary-json into one report.")
+    parser.add_argument("summaries", nargs="+", help="Summary files (globs and directories are expanded)")
+    parser.add_argument("--output", help="Output file for the merged report", default="log_summary.txt")
+    parser.add_argument("--summary-json", metavar="PATH", help="Also write the merged summary to PATH, to merge again")
+    parser.add_argument("--top-k", type=int, default=10, metavar="K",
+                        help="Most frequent ERROR/CRITICAL message templates to report")
+    parser.add_argument("--histogram-format", choices=["csv", "json"], default="csv",
+                        help="File format of the merged histogram, if the summaries have one (default: csv)")
+    args = parser.parse_args(argv)
+
+    summaries = []
+    for path in expand_log_paths(args.summaries):
+        try:
+            summaries.append(load_summary(path))
+        except FileNotFoundError:
+            print(f"Error: File {path} not found.")
+            return
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+    try:
+        summary = merge_summaries(summaries)
+    except ValueError as e:
+        print(f"Error: Cannot merge: {e}.")
+        return
+    if summary is None:
+        print("Error: No summary files to merge.")
+        return
+
+    print(f"Merged {len(summaries)} summaries.")
+    write_summary_report(summary, args.output, args.top_k)
+    if summary.histogram is not None:
+        write_histogram(summary.histogram, histogram_path(args.output, args.histogram_format), args.histogram_format)
+    if args.summary_json:
+        save_summary(summary, args.summary_json)
+
+
+# ---------------------------
+# SQLite Store (ingest / query)
+# ---------------------------
+STORE_VERSION = 1
+INGEST_BATCH_SIZE = 10_000
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    log_format TEXT NOT NULL,
+    offset INTEGER NOT NULL,      -- Bytes ingested so far (0 for compressed files, which are re-read whole)
+    fingerprint TEXT              -- JSON [length, sha1] of the file's first bytes, to notice truncation
+);
+CREATE TABLE IF NOT EXISTS entries (
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    epoch_ms INTEGER NOT NULL,
+    level TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_level_epoch ON entries (level, epoch_ms);
+CREATE INDEX IF NOT EXISTS entries_file ON entries (file_id);
+"""
+
+
+def open_store(path, create=True):
+    """Opens the SQLite store in WAL mode, creating it in a new or empty database if `create` is set.
+
+    Raises ValueError for another schema version, or for a database without a store when `create` is not set.
+    """
+    connection = sqlite3.connect(path, isolation_level=None)  # Transactions are opened explicitly
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, STORE_VERSION) or (version == 0 and not create):
+        connection.close()
+        if version == 0:
+            raise ValueError(f"{path} is not a store written by 'ingest'")
+        raise ValueError(f"{path} has store version {version}, expected {STORE_VERSION}")
+    connection.execute("PRAGMA journal_mode = WAL")
+    # With WAL, NORMAL only risks the last transactions on power loss, never corruption
+    connection.execute("PRAGMA synchronous = NORMAL")
+    if version == 0:
+        connection.executescript(STORE_SCHEMA + f"PRAGMA user_version = {STORE_VERSION};")
+    return connection
+
+
+def _store_rows(file_id, parse_fields, raw_lines, invalid):
+    """Yields (file_id, epoch_ms, level, message) for every valid line; invalid ones go to `invalid`."""
+    for line in raw_lines:
+        fields = parse_fields(line)
+        if fields is None:
+            invalid.add(line)
+            continue
+        timestamp, level, message = fields
+        try:
+            epoch_ms = timestamp_to_epoch_ms(timestamp)
+        except ValueError:
+            invalid.add(line)
+            continue
+        yield file_id, epoch_ms, level, message
+
+
+def ingest_log_file(connection, file_path, log_format="auto", invalid=None):
+    """Loads the entries of one log file into the store, in one transaction. Returns the number of entries added.
+
+    A plain file that was ingested before is read on from where the last ingest stopped, so re-running
+    after the log grew only adds the new lines. If it shrank or its head changed (truncation,
+    rotation), or it is compressed, its old entries are replaced.
+    """
+    if log_format == "auto":
+        log_format = detect_log_format(file_path)
+    if invalid is None:
+        invalid = InvalidLines(log_format=log_format)
+    path = os.path.abspath(file_path)
+    compressed = detect_compression(file_path) is not None
+    known = connection.execute("SELECT id, log_format, offset, fingerprint FROM files WHERE path = ?",
+                               (path,)).fetchone()
+
+    with open(file_path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        start = 0
+        if known is not None and not compressed and known[1] == log_format and known[2] <= size:
+            fingerprint = tuple(json.loads(known[3])) if known[3] else (0, None)
+            if fingerprint[1] is None or file_fingerprint(file, fingerprint[0]) == fingerprint:
+                start = known[2]
+        end = size if compressed else last_line_end(file, start, size)
+        fingerprint = None if compressed else json.dumps(file_fingerprint(file, min(end, FINGERPRINT_SIZE)))
+
+        connection.execute("BEGIN")
+        try:
+            if known is None:
+                file_id = connection.execute("INSERT INTO files (path, log_format, offset) VALUES (?, ?, 0)",
+                                             (path, log_format)).lastrowid
+            else:
+                file_id = known[0]
+                if start == 0:
+                    connection.execute("DELETE FROM entries WHERE file_id = ?", (file_id,))
+
+            raw_lines = read_log_file(file_path) if compressed else _read_lines_between(file, start, end)
+            rows = _store_rows(file_id, compile_log_format(log_format), raw_lines, invalid)
+            added = 0
+            while True:
+                batch = list(itertools.islice(rows, INGEST_BATCH_SIZE))
+                if not batch:
+                    break
+                connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?)", batch)
+                added += len(batch)
+            connection.execute("UPDATE files SET log_format = ?, offset = ?, fingerprint = ? WHERE id = ?",
+                               (log_format, 0 if compressed else end, fingerprint, file_id))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+    return added
+
+
+def query_conditions(severity_level=None, since_ms=None, until_ms=None, contains=None):
+    """Builds the WHERE clause and parameters of a store query.
+
+    Without a level filter, every level is listed explicitly, so SQLite can still use the
+    (level, epoch_ms) index for the time range: one index range scan per level.
+    """
+    levels = [severity_level] if severity_level else list(LOG_LEVELS)
+    clauses = [f"level IN ({', '.join('?' * len(levels))})"]
+    parameters = levels
+    if since_ms is not None:
+        clauses.append("epoch_ms >= ?")
+        parameters.append(since_ms)
+    if until_ms is not None:
+        clauses.append("epoch_ms < ?")
+        parameters.append(until_ms)
+    if contains:
+        clauses.append("instr(message, ?) > 0")  # Case-sensitive, like --match-file, and no LIKE wildcards
+        parameters.append(contains)
+    return " AND ".join(clauses), parameters
+
+
+def ingest_main(argv):
+    parser = argparse.ArgumentParser(prog="ingest", description="Load parsed log entries into a SQLite store "
+                                                                "for repeated queries with 'query'.")
+    parser.add_argument("logfile", nargs="+", help="Log files, directories or glob patterns to load")
+    parser.add_argument("--db", required=True, help="SQLite database file (created if missing)")
+    parser.add_argument("--format", choices=["auto", *LOG_FORMATS], default="auto", dest="log_format",
+                        help="Log format (default: auto, detected per file)")
+    args = parser.parse_args(argv)
+
+    try:
+        connection = open_store(args.db)
+    except (ValueError, sqlite3.DatabaseError) as e:
+        print(f"Error: {e}")
+        return
+    with closing(connection):
+        # Into an empty store, building the indexes once after the load is faster than updating them per row
+        bulk_load = connection.execute("SELECT NOT EXISTS (SELECT 1 FROM entries)").fetchone()[0]
+        if bulk_load:
+            connection.executescript("DROP INDEX entries_level_epoch; DROP INDEX entries_file;")
+        try:
+            for file_path in expand_log_paths(args.logfile):
+                started = time.perf_counter()
+                try:
+                    file_format = detect_log_format(file_path) if args.log_format == "auto" else args.log_format
+                    invalid = InvalidLines(log_format=file_format)
+                    added = ingest_log_file(connection, file_path, file_format, invalid)
+                except FileNotFoundError:
+                    print(f"Error: File {file_path} not found.")
+                    continue
+                print(f"Ingested {added} entries from {file_path} in {time.perf_counter() - started:.2f}s.")
+                if invalid.total:
+                    print(f"Warning: {invalid.describe()}")
+        finally:
+            if bulk_load:
+                connection.executescript(STORE_SCHEMA)
+
+
+def query_main(argv):
+    parser = argparse.ArgumentParser(prog="query", description="Query a store built with 'ingest'. Prints matching "
+                                                               "entries in time order, as log lines.")
+    parser.add_argument("--db", required=True, help="SQLite database file written by 'ingest'")
+    parser.add_argument("--level", choices=LOG_LEVELS, help="Only entries of this level")
+    parser.add_argument("--since", type=parse_time_bound, metavar="TIME", help="Only entries at or after TIME")
+    parser.add_argument("--until", type=parse_time_bound, metavar="TIME", help="Only entries before TIME")
+    parser.add_argument("--contains", metavar="TEXT", help="Only entries whose message contains TEXT")
+    parser.add_argument("--limit", type=int, default=100, help="Most entries to print (0 for all; default: 100)")
+    parser.add_argument("--newest", action="store_true", help="Print the newest matching entries first")
+    parser.add_argument("--count", action="store_true", help="Print the number of matching entries per level instead")
+    args = parser.parse_args(argv)
+    if args.limit < 0:
+        parser.error("--limit must be at least 0")
+    if not os.path.exists(args.db):
+        print(f"Error: File {args.db} not found.")
+        return
+
+    try:
+        connection = open_store(args.db, create=False)
+    except (ValueError, sqlite3.DatabaseError) as e:
+        print(f"Error: {e}")
+        return
+    where, parameters = query_conditions(args.level, args.since, args.until, args.contains)
+    with closing(connection):
+        if args.count:
+            counts = dict(connection.execute(f"SELECT level, COUNT(*) FROM entries WHERE {where} GROUP BY level",
+                                             parameters))
+            for level in LOG_LEVELS:
+                if args.level in (None, level):
+                    print(f"{level}: {counts.get(level, 0)}")
+            return
+
+        order = "DESC" if args.newest else ""
+        limit = f" LIMIT {args.limit}" if args.limit else ""
+        rows = connection.execute(f"SELECT epoch_ms, level, message FROM entries WHERE {where} "
+                                  f"ORDER BY epoch_ms {order}, rowid {order}{limit}", parameters)
+        for epoch_ms, level, message in rows:
+            print(f"{epoch_ms_to_timestamp(epoch_ms)} {level} {message}")
+
+
+# ---------------------------
+# Watch Mode (Alerting Daemon)
+# ---------------------------
+class SlidingWindowRate:
+    """Entry and ERROR/CRITICAL counts over the last `window_ms` of log time, for rate alerts.
+
+    The window is a ring of `slots` counters, each covering window_ms / slots. Running totals are
+    adjusted as entries arrive and as slots expire, so add() is O(1): moving the window forward
+    clears at most `slots` counters, and only when log time crosses into a new slot.
+    """
+
+    def __init__(self, window_ms, slots=60):
+        self.slots = slots
+        self.slot_ms = max(1, -(-window_ms // slots))  # Rounded up: the window is never shorter than asked
+        self.entries = array("I", [0]) * slots
+        self.errors = array("I", [0]) * slots
+        self.newest_slot = None
+        self.entry_total = 0
+        self.error_total = 0
+
+    @property
+    def window_ms(self):
+        return self.slot_ms * self.slots
+
+    @property
+    def error_rate(self):
+        """ERROR/CRITICAL entries per second over the window."""
+        return self.error_total * 1000 / self.window_ms
+
+    def add(self, epoch_ms, is_error):
+        """Counts an entry. Returns False if it is older than the window."""
+        slot = epoch_ms // self.slot_ms
+        if self.newest_slot is None:
+            self.newest_slot = slot
+        elif slot > self.newest_slot:
+            for expired in range(max(self.newest_slot + 1, slot - self.slots + 1), slot + 1):
+                index = expired % self.slots
+                self.entry_total -= self.entries[index]
+                self.error_total -= self.errors[index]
+                self.entries[index] = self.errors[index] = 0
+            self.newest_slot = slot
+        elif slot <= self.newest_slot - self.slots:
+            return False
+
+        index = slot % self.slots
+        self.entries[index] += 1
+        self.entry_total += 1
+        if is_error:
+            self.errors[index] += 1
+            self.error_total += 1
+        return True
+
+
+class RateAlarm:
+    """Watches one file's error rate and records an 'alert' event when it rises to `threshold`
+    (ERROR/CRITICAL entries per second over the window) and a 'resolved' event when it falls below.
+    Used as a LogFollower's on_entry callback; events are collected for the daemon to dispatch.
+    """
+
+    def __init__(self, file_path, window_ms, threshold):
+        self.file_path = file_path
+        self.window = SlidingWindowRate(window_ms)
+        self.threshold = threshold
+        self.firing = False
+        self.events = []
+
+    def __call__(self, entry):
+        try:
+            epoch_ms = timestamp_to_epoch_ms(entry["timestamp"])
+        except ValueError:
+            return
+        window = self.window
+        if not window.add(epoch_ms, entry["level"] in TEMPLATE_LEVELS):
+            return
+        if (window.error_rate >= self.threshold) != self.firing:
+            self.firing = not self.firing
+            self.events.append(self._event("alert" if self.firing else "resolved", entry))
+
+    def _event(self, kind, entry):
+        window = self.window
+        return {
+            "event": kind,
+            "file": self.file_path,
+            "timestamp": entry["timestamp"],
+            "window_seconds": window.window_ms / 1000,
+            "errors": window.error_total,
+            "entries": window.entry_total,
+            "error_rate": round(window.error_rate, 3),
+            "threshold": self.threshold,
+            "message": entry["message"] if kind == "alert" else None,
+        }
+
+
+class AlertSink:
+    """Where alert events go: JSON lines appended to `alert_file`, the JSON on the stdin of the shell
+    command `alert_command`, or, with neither, JSON lines on `stream` (stdout)."""
+
+    def __init__(self, alert_file=None, alert_command=None, stream=None):
+        self.alert_file = alert_file
+        self.alert_command = alert_command
+        self.stream = stream or sys.stdout
+
+    async def send(self, event):
+        line = json.dumps(event)
+        if self.alert_file is None and self.alert_command is None:
+            print(line, file=self.stream, flush=True)
+        if self.alert_file is not None:
+            with open(self.alert_file, "a") as f:
+                f.write(line + "\n")
+        if self.alert_command is not None:
+            try:
+                process = await asyncio.create_subprocess_shell(self.alert_command, stdin=asyncio.subprocess.PIPE)
+                await process.communicate(line.encode() + b"\n")
+            except OSError as e:
+                print(f"Warning: Alert command failed: {e}")
+                return
+            if process.returncode:
+                print(f"Warning: Alert command exited with status {process.returncode}")
+
+
+async def watch_file(follower, alarm, sink, interval):
+    """Polls one file until cancelled. Reads run in a worker thread, so a large append cannot stall the other files."""
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(follower.poll)
+            except OSError as e:
+                print(f"Warning: Cannot read {follower.file_path}: {e}")
+            except Exception as e:
+                # One bad file must not take the daemon, and every other file's watch, down with it
+                print(f"Warning: Failed to process {follower.file_path}: {e!r}")
+            events, alarm.events = alarm.events, []
+            for event in events:
+                # Sent one at a time, so a file's resolved event never overtakes its alert
+                await sink.send(event)
+            await asyncio.sleep(interval)
+    finally:
+        follower.close()
+
+
+async def watch_logs(file_paths, window_ms, threshold, sink, interval=1.0, log_format="auto", from_start=False):
+    """Watches every file concurrently, one asyncio task and one sliding window per file."""
+    tasks = []
+    for file_path in file_paths:
+        try:
+            compression = detect_compression(file_path)
+        except OSError:
+            compression = None  # Not there yet; picked up once it is created
+        if compression:
+            print(f"Notice: Not watching {file_path}: {compression} files are not appended to.")
+            continue
+        file_format = log_format
+        if file_format == "auto":
+            try:
+                file_format = detect_log_format(file_path)
+            except OSError:
+                file_format = "default"
+        alarm = RateAlarm(file_path, window_ms, threshold)
+        follower = LogFollower(file_path, on_entry=alarm, log_format=file_format)
+        if not from_start:
+            follower.skip_to_end()
+        tasks.append(watch_file(follower, alarm, sink, interval))
+    await asyncio.gather(*tasks)
+
+
+def watch_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="watch", description="Watch log files and alert when the ERROR/CRITICAL rate over a sliding window "
+                                  "reaches a threshold. Runs until interrupted.")
+    parser.add_argument("logfile", nargs="+", help="Log files, directories or glob patterns to watch")
+    parser.add_argument("--window", type=float, default=60.0, metavar="SECONDS",
+                        help="Sliding window length in log time (default: 60)")
+    parser.add_argument("--threshold", type=float, required=True, metavar="RATE",
+                        help="Alert when ERROR/CRITICAL entries per second over the window reach RATE")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls of each file")
+    parser.add_argument("--alert-file", metavar="PATH", help="Append alert events to PATH as JSON lines")
+    parser.add_argument("--alert-command", metavar="CMD",
+                        help="Run the shell command CMD for each alert event, with the event as JSON on its stdin")
+    parser.add_argument("--format", choices=["auto", *LOG_FORMATS], default="auto", dest="log_format",
+                        help="Log format (default: auto, detected per file)")
+    parser.add_argument("--from-start", action="store_true",
+                        help="Read the files' existing lines too, instead of only lines appended from now on")
+    args = parser.parse_args(argv)
+    if args.window < 1 or args.threshold <= 0 or args.interval <= 0:
+        parser.error("--window must be at least 1 second, and --threshold and --interval positive")
+
+    # Stdout carries the alert events; notices and warnings go to stderr so it stays pure JSON lines
+    sink = AlertSink(args.alert_file, args.alert_command, sys.stdout)
+    with redirect_stdout(sys.stderr):
+        file_paths = expand_log_paths(args.logfile)
+        if not file_paths:
+            parser.error("no log files to watch")
+        print(f"Watching {len(file_paths)} file(s); alerting at {args.threshold:g} ERROR/CRITICAL entries per "
+              f"second over {args.window:g}s.")
+        try:
+            asyncio.run(watch_logs(file_paths, round(args.window * 1000), args.threshold, sink, args.interval,
+                                   args.log_format, args.from_start))
+        except KeyboardInterrupt:
+            pass
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+def generate_sample_log(file_path, line_count, seed=0):
+    """Writes a synthetic log in the analyzer's format, for benchmarks."""
+    rng = random.Random(seed)
+    levels = rng.choices(LOG_LEVELS, weights=(70, 20, 8, 2), k=line_count)
+    start = datetime(2024, 1, 1)
+    with open(file_path, "w") as file:
+        for i, level in enumerate(levels):
+            timestamp = (start + timedelta(milliseconds=i * 37)).strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
+            file.write(f"{timestamp} {level} request {rng.randrange(1 << 32):08x} handled in {rng.randrange(1000)} ms\n")
+
+
+def _count_lines(file_path):
+    with open(file_path, "rb") as file:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: file.read(1 << 20), b""))
+
+
+def bench_workers(args):
+    """Measures how parallel aggregation throughput scales with the worker count."""
+    size = os.path.getsize(args.logfile)
+    line_count = _count_lines(args.logfile)
+    print(f"{args.logfile}: {size / 1e6:.1f} MB, {line_count} lines")
+    print(f"{'workers':>7} {'seconds':>9} {'MB/s':>9} {'lines/s':>12} {'speedup':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            if workers > 1:
+                aggregate_logs_parallel(args.logfile, workers, use_mmap=args.mmap)
+            elif args.mmap:
+                aggregate_logs_mmap(args.logfile)
+            else:
+                aggregate_logs(read_log_file(args.logfile))
+            best = min(best, time.perf_counter() - started)
+        baseline = baseline or best
+        print(f"{workers:>7} {best:>9.3f} {size / 1e6 / best:>9.1f} {line_count / best:>12,.0f} "
+              f"{baseline / best:>7.2f}x")
+
+
+def _legacy_parse_log_line(line):
+    """The original per-call re.match parser, kept as the baseline for `bench parser`."""
+    pattern = r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) (INFO|WARNING|ERROR|CRITICAL) (.+)$'
+    match = re.match(pattern, line)
+    if match:
+        timestamp_str, level, message = match.groups()
+        return {"timestamp": timestamp_str, "level": level, "message": message}
+    return None
+
+
+def bench_parser(args):
+    """Compares line parsers on the same lines and reports lines/sec."""
+    with open(args.logfile) as file:
+        lines = [line.strip() for line, _ in zip(file, range(args.lines))]
+    parsers = [("legacy re.match + dict", _legacy_parse_log_line),
+               ("parse_log_line", parse_log_line),
+               ("parse_log_fields", parse_log_fields)]
+
+    print(f"{len(lines)} lines, best of {args.repeat}")
+    print(f"{'parser':<24} {'seconds':>9} {'lines/s':>12} {'speedup':>8}")
+    baseline = None
+    for name, parse in parsers:
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for line in lines:
+                parse(line)
+            best = min(best, time.perf_counter() - started)
+        baseline = baseline or best
+        print(f"{name:<24} {best:>9.3f} {len(lines) / best:>12,.0f} {baseline / best:>7.2f}x")
+
+
+def bench_table(args):
+    """Compares memory and filter/count time of a list of dicts against a LogTable."""
+    with open(args.logfile) as file:
+        lines = [line.strip() for line, _ in zip(file, range(args.lines))]
+
+    def build_dicts():
+        return [entry for entry in map(parse_log_line, lines) if entry]
+
+    def build_table():
+        table = LogTable()
+        for fields in map(parse_log_fields, lines):
+            if fields:
+                table.append(*fields)
+        return table
+
+    print(f"{len(lines)} lines")
+    print(f"{'store':<14} {'MB':>8} {'bytes/entry':>12} {'filter s':>9} {'count s':>9} {'latest s':>9}")
+    for name, build in (("list of dicts", build_dicts), ("LogTable", build_table)):
+        tracemalloc.start()
+        logs = build()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        timings = []
+        for step in (lambda: filter_logs_by_level(logs, "ERROR"), lambda: count_log_level(logs),
+                     lambda: find_most_recent_error(logs)):
+            started = time.perf_counter()
+            step()
+            timings.append(time.perf_counter() - started)
+        print(f"{name:<14} {used / 1e6:>8.1f} {used / max(len(logs), 1):>12.1f} "
+              f"{timings[0]:>9.3f} {timings[1]:>9.3f} {timings[2]:>9.3f}")
+        logs = None  # Freed before the next store is built and measured
+
+
+def bench_main(argv):
+    parser = argparse.ArgumentParser(prog="bench", description="DevOps Log Analyzer benchmarks.")
+    suites = parser.add_subparsers(dest="suite", required=True)
+
+    workers_parser = suites.add_parser("workers", help="Throughput of --workers N across worker counts")
+    workers_parser.add_argument("logfile", nargs="?", help="Log file to scan (a synthetic one is generated if omitted)")
+    workers_parser.add_argument("--lines", type=int, default=2_000_000, help="Size of the generated log in lines")
+    workers_parser.add_argument("--workers", type=lambda v: [int(n) for n in v.split(",")],
+                                default=[1, 2, 4, 8], help="Comma-separated worker counts to try")
+    workers_parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count (best is reported)")
+    workers_parser.add_argument("--mmap", action="store_true", help="Benchmark the memory-mapped bytes path")
+    workers_parser.set_defaults(run=bench_workers)
+
+    parser_parser = suites.add_parser("parser", help="Lines/sec of the line parser against the original")
+    parser_parser.add_argument("logfile", nargs="?", help="Log file to take lines from (generated if omitted)")
+    parser_parser.add_argument("--lines", type=int, default=500_000, help="Number of lines to parse")
+    parser_parser.add_argument("--repeat", type=int, default=5, help="Runs per parser (best is reported)")
+    parser_parser.set_defaults(run=bench_parser)
+
+    table_parser = suites.add_parser("table", help="Memory and filter/count time: list of dicts vs LogTable")
+    table_parser.add_argument("logfile", nargs="?", help="Log file to take lines from (generated if omitted)")
+    table_parser.add_argument("--lines", type=int, default=500_000, help="Number of lines to load")
+    table_parser.set_defaults(run=bench_table)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "logfile", "") is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            args.logfile = os.path.join(tmp, "sample.log")
+            generate_sample_log(args.logfile, args.lines)
+            args.run(args)
+    else:
+        args.run(args)
+
+
+# First-argument commands, each with its own argument parser
+SUBCOMMANDS = {"merge": merge_main, "ingest": ingest_main, "query": query_main, "watch": watch_main,
+               "bench": bench_main}
+
+
 def main():
-    parser = argparse.ArgumentParser(description="DevOps Log Analyzer: Parses logs and generates a summary.")
-    parser.add_argument("logfile", help="Path to log file.")
+    command = SUBCOMMANDS.get(sys.argv[1]) if len(sys.argv) > 1 else None
+    if command is not None:
+        command(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="DevOps Log Analyzer: Parses logs and generates a summary.",
+                                     epilog="Other commands, given as the first argument: 'merge' (combine --summary-json "
+                                            "files), 'ingest' and 'query' (SQLite store), 'watch' (alerting daemon) "
+                                            "and 'bench' (benchmarks). Run one with --help for its options.")
+    parser.add_argument("logfile", nargs="+",
+                        help="Path to log file. Several files, directories or glob patterns are merged into one report.")
     parser.add_argument("--level", help="Filter logs by severity level (INFO, WARNING, ERROR, CRITICAL)",
-                        choices=["INFO", "WARNING", "ERROR", "CRITICAL"])
+                        choices=LOG_LEVELS)
     parser.add_argument("--output", help="Output file for the summary report", default="log_summary.txt")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode to print parsed logs")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parse the file in N processes over newline-aligned byte ranges")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Memory-map the file and count lines as raw bytes, decoding only reported fields")
+    parser.add_argument("--checkpoint", help="Resume from (and save) the byte offset and partial aggregates here")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep polling the file for appended lines, updating the report as they arrive")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls in --follow mode")
+    parser.add_argument("--since", type=parse_time_bound, metavar="TIME",
+                        help="Only entries at or after TIME (YYYY-MM-DD[ HH:MM[:SS[,mmm]]]); uses a LOGFILE.idx time index")
+    parser.add_argument("--until", type=parse_time_bound, metavar="TIME",
+                        help="Only entries before TIME; uses a LOGFILE.idx time index")
+    parser.add_argument("--index-every", type=int, default=1000, metavar="N",
+                        help="Lines between time index samples (default: 1000)")
+    parser.add_argument("--match-file", metavar="PATTERNS",
+                        help="Count the entries whose message contains each line of PATTERNS (literal strings)")
+    parser.add_argument("--format", choices=["auto", *LOG_FORMATS], default="auto", dest="log_format",
+                        help="Log format (default: auto, detected from the first few KB of the first file): "
+                             + "; ".join(f"{name}: {build.__doc__.splitlines()[0]}" for name, build in LOG_FORMATS.items()))
+    parser.add_argument("--multiline", action="store_true",
+                        help="Fold continuation lines (stack traces) into the entry they follow")
+    parser.add_argument("--multiline-max-lines", type=int, default=200, metavar="N",
+                        help="Continuation lines kept per entry with --multiline (default: 200)")
+    parser.add_argument("--multiline-max-chars", type=int, default=65536, metavar="N",
+                        help="Characters kept per folded entry with --multiline (default: 65536)")
+    parser.add_argument("--reject-file", metavar="PATH",
+                        help="Write every line that fails to parse to PATH (appended to in --checkpoint/--follow mode)")
+    parser.add_argument("--top-k", type=int, default=10, metavar="K",
+                        help=f"Most frequent ERROR/CRITICAL message templates to report (0 to omit, max {TEMPLATE_CAPACITY})")
+    parser.add_argument("--histogram-interval", type=float, metavar="SECONDS",
+                        help="Also count each level per SECONDS-wide time bucket, written next to the report "
+                             "as OUTPUT.histogram.csv (or .json)")
+    parser.add_argument("--histogram-buckets", type=int, metavar="N",
+                        help=f"Keep only the newest N buckets in a ring buffer (default: all; "
+                             f"{HISTOGRAM_FOLLOW_BUCKETS} with --follow)")
+    parser.add_argument("--histogram-format", choices=["csv", "json"], default="csv",
+                        help="File format of the histogram (default: csv)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print throughput (bytes/s, lines/s), parse-failure rate, peak RSS and phase times")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="Profile the aggregation with cProfile, save the data to PATH and print the top functions")
+    parser.add_argument("--summary-json", metavar="PATH",
+                        help="Also write the summary as versioned JSON (gzipped if PATH ends in .gz), "
+                             "for the 'merge' command")
 
     args = parser.parse_args()
+    stats = RunStats()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    incremental = args.checkpoint or args.follow
+    if incremental and args.workers > 1:
+        parser.error("--checkpoint/--follow read incrementally and cannot be combined with --workers")
 
-    raw_lines = read_log_file(args.logfile)
-    parsed_logs = parse_logs(raw_lines)
+    time_range = args.since is not None or args.until is not None
+    if time_range and (incremental or args.workers > 1):
+        parser.error("--since/--until cannot be combined with --checkpoint, --follow or --workers")
+    if args.index_every < 1:
+        parser.error("--index-every must be at least 1")
+    if args.follow and (args.stats or args.profile):
+        parser.error("--stats and --profile measure a finished run and cannot be combined with --follow")
+    if not 0 <= args.top_k <= TEMPLATE_CAPACITY:
+        parser.error(f"--top-k must be between 0 and {TEMPLATE_CAPACITY}")
+    if args.multiline and (args.mmap or args.workers > 1 or incremental):
+        # Byte ranges, the bytes fast path and polls all cut the input at line boundaries
+        parser.error("--multiline cannot be combined with --mmap, --workers, --checkpoint or --follow")
+    if args.multiline_max_lines < 0 or args.multiline_max_chars < 1:
+        parser.error("--multiline-max-lines must be at least 0 and --multiline-max-chars at least 1")
+    histogram_interval_ms = None
+    if args.histogram_interval is not None:
+        histogram_interval_ms = round(args.histogram_interval * 1000)
+        if histogram_interval_ms < 1:
+            parser.error("--histogram-interval must be at least 0.001 seconds")
+    histogram_buckets = args.histogram_buckets
+    if histogram_buckets is not None and (histogram_buckets < 1 or not incremental):
+        parser.error("--histogram-buckets must be at least 1 and is only used with --checkpoint or --follow")
+    if histogram_buckets is None and args.follow:
+        histogram_buckets = HISTOGRAM_FOLLOW_BUCKETS
 
-    if args.level:
-        parsed_logs = filter_logs_by_level(parsed_logs, args.level)
+    log_paths = expand_log_paths(args.logfile)
+    if len(log_paths) > 1 and (incremental or time_range):
+        parser.error("--checkpoint, --follow, --since and --until take a single log file")
+    if len(log_paths) == 1 and (incremental or time_range):
+        try:
+            compression = detect_compression(log_paths[0])
+        except OSError:
+            compression = None
+        if compression:
+            parser.error(f"--checkpoint, --follow, --since and --until need byte offsets and cannot read {compression} input")
 
-    level_counts = count_log_level(parsed_logs)
-    most_recent_err = find_most_recent_error(parsed_logs)
+    log_format = args.log_format
+    if log_format == "auto":
+        try:
+            log_format = detect_log_format(log_paths[0]) if log_paths else "default"
+        except OSError:
+            log_format = "default"
+        if log_format != "default":
+            print(f"Notice: Detected {log_format} log format.")
+    if args.multiline and log_format != "default":
+        parser.error(f"--multiline is only supported for the default format, not {log_format}")
 
-    write_summary_report(parsed_logs, level_counts, most_recent_err, args.output)
+    matcher = None
+    if args.match_file:
+        try:
+            matcher = AhoCorasick.from_file(args.match_file)
+        except FileNotFoundError:
+            print(f"Error: File {args.match_file} not found.")
+            return
 
+    fold_lines = functools.partial(fold_continuation_lines, max_lines=args.multiline_max_lines,
+                                   max_chars=args.multiline_max_chars) if args.multiline else None
+
+    on_entry = None
     if args.debug:
         print("Debug Mode: Parsed Logs")
-        for log in parsed_logs:
-            print(log)
+        on_entry = print
+
+    profiler = cProfile.Profile() if args.profile else None
+    input_bytes = None  # Set by the paths that read less than the whole files
+    lines_before = 0
+    stats.lap("setup")
+    reject_file = open_reject_file(args.reject_file, append=incremental) if args.reject_file else None
+    with reject_file or nullcontext(), profiler or nullcontext():
+        if not log_paths:
+            summary = LogSummary(args.level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                                 histogram_interval_ms=histogram_interval_ms)
+        elif len(log_paths) > 1:
+            if args.workers > 1:
+                summary = aggregate_log_files_parallel(log_paths, args.workers, args.level, args.mmap, on_entry,
+                                                       matcher, reject_file, log_format, histogram_interval_ms)
+            elif args.mmap and on_entry is None:
+                # Without debug output the order only matters for ERROR ties, which file order resolves the same way
+                summary = LogSummary(args.level, matcher=matcher, reject_file=reject_file, log_format=log_format,
+                                     histogram_interval_ms=histogram_interval_ms)
+                for log_path in log_paths:
+                    summary.merge(aggregate_logs_mmap(log_path, args.level, matcher=matcher,
+                                                      reject_file=reject_file, log_format=log_format,
+                                                      histogram_interval_ms=histogram_interval_ms))
+            else:
+                summary = aggregate_log_files(log_paths, args.level, on_entry, matcher, reject_file, fold_lines,
+                                              log_format, histogram_interval_ms)
+        elif time_range:
+            summary = aggregate_time_range(log_paths[0], args.since, args.until, args.level, args.mmap, on_entry,
+                                           args.index_every, matcher, reject_file, fold_lines, log_format,
+                                           histogram_interval_ms)
+        elif incremental:
+            follower = LogFollower(log_paths[0], args.level, args.checkpoint, args.mmap, on_entry, matcher,
+                                   reject_file, log_format, histogram_interval_ms, histogram_buckets)
+            lines_before = follower.summary.total_logs + follower.summary.filtered + follower.summary.invalid.total
+            input_bytes = run_incremental(follower, args.output, args.follow, args.interval, args.top_k,
+                                          args.histogram_format, args.summary_json)
+            summary = follower.summary
+        elif args.workers > 1:
+            summary = aggregate_logs_parallel(log_paths[0], args.workers, args.level, args.mmap, on_entry, matcher,
+                                              reject_file, log_format, histogram_interval_ms)
+        elif args.mmap:
+            summary = aggregate_logs_mmap(log_paths[0], args.level, on_entry, matcher=matcher,
+                                          reject_file=reject_file, log_format=log_format,
+                                          histogram_interval_ms=histogram_interval_ms)
+        else:
+            # One streaming pass: nothing but the running summary is kept in memory
+            raw_lines = read_log_file(log_paths[0])
+            if fold_lines is not None:
+                raw_lines = fold_lines(raw_lines)
+            summary = aggregate_logs(raw_lines, args.level, on_entry, matcher, reject_file, log_format,
+                                     histogram_interval_ms)
+
+    stats.lap("aggregate")
+    if profiler is not None:
+        print_profile(profiler, args.profile)
+
+    if not incremental:  # run_incremental() has written everything already
+        if summary.invalid.total:
+            print(f"Warning: {summary.invalid.describe()}")
+        write_summary_report(summary, args.output, args.top_k)
+        if summary.histogram is not None:
+            if summary.histogram.dropped:
+                print(f"Warning: {summary.histogram.dropped} entries left out of the histogram (outside its "
+                      f"{summary.histogram.max_buckets} buckets or with an unreadable timestamp).")
+            write_histogram(summary.histogram, histogram_path(args.output, args.histogram_format),
+                            args.histogram_format)
+        if args.summary_json:
+            save_summary(summary, args.summary_json)
+        stats.lap("write report")
+
+    if args.stats:
+        if input_bytes is None and time_range and len(log_paths) == 1 and log_format == "default":
+            # Only the region the time index pointed to was read
+            input_bytes = time_range_bytes(log_paths[0], args.since, args.until, args.index_every)
+        if input_bytes is None:
+            input_bytes = sum(os.path.getsize(path) for path in log_paths if os.path.isfile(path))
+        print("Stats:")
+        for line in stats.describe(summary, input_bytes, workers=args.workers > 1, lines_before=lines_before):
+            print(f"  {line}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""
+Load test for dark_server.py: many simulated players, each on its own local connection,
+answering every prompt from one of dark_replay's recorded scripts.
+
+Usage:
+    python dark_loadtest.py --clients 300                        # starts a server in this process
+    python dark_loadtest.py --clients 300 --connect 127.0.0.1:4000
+"""
+import argparse
+import asyncio
+import time
+
+import dark_replay
+import dark_server
+
+VICTORY = b"CONGRATULATIONS"
+
+
+async def read_until_prompt(reader):
+    """
+    Reads the game's output up to its next prompt (prompts don't end in a newline) or until the
+    server closes the connection. Returns (output, still connected).
+    """
+    output = b""
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            return output, False
+        output += chunk
+        if not output.endswith(b"\n"):
+            return output, True
+
+
+async def play_client(host, port, choices):
+    """One simulated player. Returns (response latencies in seconds, won, bytes received)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies = []
+    received = 0
+    won = False
+    try:
+        output, connected = await read_until_prompt(reader)
+        received += len(output)
+        for choice in choices:
+            if not connected:
+                break
+            sent = time.perf_counter()
+            writer.write(choice.encode("utf-8") + b"\r\n")
+            await writer.drain()
+            output, connected = await read_until_prompt(reader)
+            latencies.append(time.perf_counter() - sent)
+            received += len(output)
+            won = won or VICTORY in output
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+    return latencies, won, received
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+async def run(args):
+    choices = dark_replay.SCRIPTS[args.script]["choices"]
+    server = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        port = int(port)
+    else:
+        server = await dark_server.start_server("127.0.0.1", 0, backlog=max(100, args.clients))
+        host, port = server.sockets[0].getsockname()[:2]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(play_client(host, port, choices) for _ in range(args.clients)),
+                                   return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    failures = [result for result in results if isinstance(result, BaseException)]
+    finished = [result for result in results if not isinstance(result, BaseException)]
+    latencies = sorted(latency for client_latencies, _, _ in finished for latency in client_latencies)
+    wins = sum(won for _, won, _ in finished)
+
+    print(f"Clients: {args.clients:,} concurrent, script '{args.script}' ({len(choices)} answers each)")
+    print(f"Games: {len(finished):,} finished, {wins:,} won, {len(failures):,} failed connections")
+    print(f"Elapsed: {elapsed:.2f}s ({len(finished) / elapsed:,.0f} games/s, {len(latencies) / elapsed:,.0f} answers/s, "
+          f"{sum(received for _, _, received in finished) / elapsed / 1e6:.1f} MB/s of game text)")
+    print(f"Response latency: p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {(latencies[-1] if latencies else 0) * 1000:.2f} ms")
+    for failure in failures[:5]:
+        print(f"Error: {failure!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive dark_server.py with many simulated players.")
+    parser.add_argument("--clients", type=int, default=200, help="Simulated players, all connected at once")
+    parser.add_argument("--script", choices=list(dark_replay.SCRIPTS), default="dragon",
+                        help="dark_replay script each player follows (default: dragon)")
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="Test a running server instead of starting one in this process")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Scripted replays of Dark.py, for regression checks and throughput benchmarks.
+
+Each playthrough gives a Dark.Session a recorded list of choices as its input, seeds random,
+captures everything the game prints into a buffer and walks the SCENES loop exactly like Dark.play().
+Built-in scripts check the game logic still ends where it should; a script file (one choice per
+line, blank lines press ENTER, lines starting with '#' are comments) can be replayed too.
+
+Usage:
+    python dark_replay.py                        # every built-in script, 1000 runs each
+    python dark_replay.py --script dragon --runs 5000
+    python dark_replay.py --script my_session.txt --show
+"""
+import argparse
+import io
+import os
+import random
+import time
+
+import Dark
+
+
+class ReplayExhausted(Exception):
+    """The game asked for more input than the script recorded."""
+
+
+# ---------------------------
+# Recorded Scripts
+# ---------------------------
+# Attack Power 100 and Armor Class 20: every enemy needs a natural 20 to hit, so nearly every seed
+# reaches the dragon. A run that dies anyway counts as lost rather than as a problem, unless the
+# script is meant to die.
+HERO = ["100", "20"]
+THREE_WOLVES = ["1", "2", "A", "2", "A", "2", "A", "3"]  # Forest, fight three wolves, back to the menu
+KEEP_SWORD = ["2", "1", "Y", "3"]  # Village, the Elder hands over the sword, back to the menu
+FETCH_STONE = ["1", "1", "3", "1", "1", "2", "3", "2"]  # Crossroads, stream, island: key, chest, back
+
+SCRIPTS = {
+    "dragon": {
+        "choices": HERO + THREE_WOLVES + KEEP_SWORD + FETCH_STONE
+                   + ["2", "A", "1"]  # The bear, skinned
+                   + ["1", "1", "2", "", "", "A", ""],  # Mountain, rest, ark, the dragon, the end
+        "ends_at": None,
+        "state": {"dragon_defeated": True, "has_magical_sword": True, "bear_defeated": True,
+                  "armor_class": 22, "attack_power": 106,
+                  "inventory": ["Magical Sword", "Rusted Key", "Mysterious Stone"]},
+    },
+    "ark_locked": {
+        "choices": HERO + THREE_WOLVES + KEEP_SWORD + ["1", "1", "1", "2", "1", "4"],
+        "ends_at": "mountain_path",
+        "state": {"magic_stone_obtained": False, "player_health": 100, "inventory": ["Magical Sword"]},
+    },
+    "wolf_death": {
+        # Attack Power 0 can't hurt the wolf, so the player dies and the game starts over
+        "choices": ["0", "1", "1", "2", "A", "", "7", "9", "3", "4"],
+        "ends_at": "choose_location",
+        "dies": True,
+        "state": {"attack_power": 7, "armor_class": 9, "dire_wolf_defeated_count": 0, "inventory": []},
+    },
+    "invalid_input": {
+        "choices": HERO + ["x", "2", "5", "2", "1", "maybe", "n", "9", "3", "1", "2", "?", "B", "a", "1", "4"],
+        "ends_at": "forest_options",
+        "state": {"elder_quest_accepted": False, "dire_wolf_defeated_count": 1},
+    },
+}
+
+
+def load_script(path):
+    """Reads a recorded session: one choice per line, '#' comments, blank lines press ENTER."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\r\n") for line in f if not line.startswith("#")]
+
+
+# ---------------------------
+# Replay
+# ---------------------------
+def run_without_loop(coroutine):
+    """
+    Runs a coroutine that never has to wait (scripted input is always ready) without the
+    overhead of an event loop.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError("A scripted playthrough tried to wait for I/O")
+
+
+def replay(choices, seed=0, output=None):
+    """
+    Plays the game from the start with the given choices and returns (session, scenes visited,
+    scene the game stopped at). The game stops at None when it is won, or at whichever scene
+    asked for input after the script ran out. Everything the game prints goes to `output`.
+    """
+    output = output if output is not None else io.StringIO()
+    remaining = iter(choices)
+
+    async def scripted_input(prompt=""):
+        for choice in remaining:
+            output.write(f"{prompt}{choice}\n")
+            return choice
+        output.write(prompt)
+        raise ReplayExhausted(prompt)
+
+    async def scene_loop():
+        scene = "start"
+        try:
+            while scene is not None:
+                scenes.append(scene)
+                scene = await Dark.SCENES[scene](session)
+        except ReplayExhausted:
+            pass
+        return scene
+
+    random.seed(seed)
+    session = Dark.Session(output.write, scripted_input)
+    scenes = []
+    return session, scenes, run_without_loop(scene_loop())
+
+
+def check(name, script, session, scenes, ended, seed):
+    """Problems with a built-in script's playthrough, as a list of messages; None if the run was lost."""
+    if "game_over" in scenes and not script.get("dies"):
+        return None
+    problems = []
+    if ended != script["ends_at"]:
+        problems.append(f"{name} (seed {seed}) stopped at {ended or 'the end'}, expected {script['ends_at'] or 'the end'}")
+    for key, expected in script["state"].items():
+        if getattr(session, key) != expected:
+            problems.append(f"{name} (seed {seed}): {key} is {getattr(session, key)!r}, expected {expected!r}")
+    return problems
+
+
+def benchmark(name, choices, runs, seed, script=None):
+    """Replays a script `runs` times with seeds seed, seed + 1, ... and prints its throughput line."""
+    problems = []
+    lost = scenes_visited = 0
+    started = time.perf_counter()
+    for run_seed in range(seed, seed + runs):
+        session, scenes, ended = replay(choices, run_seed)
+        scenes_visited += len(scenes)
+        if script is not None:
+            run_problems = check(name, script, session, scenes, ended, run_seed)
+            if run_problems is None:
+                lost += 1
+            else:
+                problems.extend(run_problems)
+    elapsed = time.perf_counter() - started
+    status = f"{len(problems)} problem(s)" if problems else ("ok" if script is not None else "not checked")
+    print(f"{name:<16} {runs:>7,} {lost:>5,} {scenes_visited / runs:>7.1f} {runs / elapsed:>10,.0f} "
+          f"{scenes_visited / elapsed:>10,.0f}  {status}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Dark.py sessions and measure their throughput.")
+    parser.add_argument("--script", action="append", metavar="NAME|FILE",
+                        help=f"Built-in script ({', '.join(SCRIPTS)}) or a recorded session file; "
+                             "may be repeated (default: every built-in script)")
+    parser.add_argument("--runs", type=int, default=1000, help="Playthroughs per script (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first playthrough; each run adds one")
+    parser.add_argument("--show", action="store_true", help="Print the first playthrough of each script and stop")
+    args = parser.parse_args()
+
+    names = args.script or list(SCRIPTS)
+    for name in names:
+        if name not in SCRIPTS and not os.path.exists(name):
+            parser.error(f"Unknown script {name!r}: not a built-in script or a file")
+
+    if args.show:
+        for name in names:
+            choices = SCRIPTS[name]["choices"] if name in SCRIPTS else load_script(name)
+            output = io.StringIO()
+            _, scenes, ended = replay(choices, args.seed, output)
+            print(output.getvalue())
+            print(f"--- {name}: {len(scenes)} scenes, stopped at {ended or 'the end'} ---\n")
+        return
+
+    print(f"{'script':<16} {'runs':>7} {'lost':>5} {'scenes':>7} {'plays/s':>10} {'scenes/s':>10}  checks")
+    problems = []
+    for name in names:
+        if name in SCRIPTS:
+            problems.extend(benchmark(name, SCRIPTS[name]["choices"], args.runs, args.seed, SCRIPTS[name]))
+        else:
+            benchmark(os.path.basename(name), load_script(name), args.runs, args.seed)
+
+    for problem in problems[:20]:
+        print(f"Error: {problem}")
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
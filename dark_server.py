@@ -0,0 +1,94 @@
+"""
+Telnet-style multiplayer server for Dark.py.
+
+Every connection gets its own Dark.Session, so hundreds of players can share one process; the
+game awaits each player's next line instead of blocking on input().
+
+Usage:
+    python dark_server.py --port 4000
+    telnet localhost 4000
+"""
+import argparse
+import asyncio
+from functools import partial
+
+import Dark
+
+
+class Disconnected(Exception):
+    """The player left (or idled out) while the game waited for their input."""
+
+
+async def handle_player(reader, writer, idle_timeout=None, log=None):
+    """
+    Plays one game over a connection. A death restarts the game as it does on the console;
+    the connection is closed once the dragon is defeated or the player leaves.
+    """
+    peer = writer.get_extra_info("peername")
+
+    def send(text):
+        writer.write(text.replace("\n", "\r\n").encode("utf-8"))
+
+    async def receive(prompt=""):
+        send(prompt)
+        await writer.drain()
+        try:
+            line = await asyncio.wait_for(reader.readline(), idle_timeout)
+        except asyncio.TimeoutError:
+            send("\nDisconnected after being idle too long.\n")
+            raise Disconnected from None
+        except ValueError:  # readline() gives up on a line longer than the stream limit (64 KiB)
+            send("\nDisconnected: that line was too long.\n")
+            raise Disconnected from None
+        if not line:
+            raise Disconnected
+        return line.decode("utf-8", "replace").strip("\r\n\0")
+
+    if log:
+        log(f"Notice: Player connected from {peer}")
+    try:
+        await Dark.play(Dark.Session(send, receive))
+        await writer.drain()
+    except (Disconnected, ConnectionError):
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+        if log:
+            log(f"Notice: Player from {peer} left")
+
+
+async def start_server(host="127.0.0.1", port=4000, idle_timeout=None, backlog=100, log=None):
+    """Starts listening and returns the asyncio Server; port 0 picks a free port."""
+    return await asyncio.start_server(partial(handle_player, idle_timeout=idle_timeout, log=log),
+                                      host, port, backlog=backlog)
+
+
+async def serve(args):
+    server = await start_server(args.host, args.port, args.idle_timeout, args.backlog, log=print)
+    addresses = ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+    print(f"Serving Dark on {addresses} (Ctrl+C to stop)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Dark.py for many players over TCP (telnet).")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=4000, help="Port to listen on (default: 4000)")
+    parser.add_argument("--idle-timeout", type=float, default=600,
+                        help="Seconds a player may take to answer before being disconnected (default: 600)")
+    parser.add_argument("--backlog", type=int, default=100, help="Pending connections the OS may queue")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Headless Monte Carlo combat simulator for the encounters in Dark.py.
+
+Fights use the game's own rules (Dark.resolve_attack) and enemy stats (Dark.ENEMIES), but nothing
+is printed and nothing waits for input, so millions of fights can be run to balance the encounters.
+
+Usage:
+    python dark_sim.py --enemy wolf --attack 5-15 --armor-class 10-20 --fights 1000000
+"""
+import argparse
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import accumulate
+from operator import le
+
+import Dark
+
+try:
+    import numpy
+except ImportError:  # The pure-Python sampler is used instead
+    numpy = None
+
+# A fight nobody can win (e.g. Attack Power 0 against each other) is cut off here and counted as a draw
+MAX_ROUNDS = 10_000
+NEVER = MAX_ROUNDS + 1
+# Kill-round distributions stop once the chance of the fight still going on drops below this
+NEGLIGIBLE = 1e-12
+
+
+# ---------------------------
+# Reference engine: one dice roll at a time
+# ---------------------------
+def simulate_fight(enemy, attack_power, armor_class, rng=random, player_health=100):
+    """
+    Plays one fight the way Dark.fight_dire_wolf/fight_grizzly_bear/fight_dragon do, silently:
+    each round the player attacks first, then the enemy. Returns (outcome, rounds), where
+    outcome is "win", "loss" or "draw" (nobody won within MAX_ROUNDS).
+    """
+    stats = Dark.ENEMIES[enemy]
+    enemy_health = stats["health"]
+    player_skip_turn = enemy_skip_turn = False
+
+    for round_number in range(1, MAX_ROUNDS + 1):
+        if player_skip_turn:
+            player_skip_turn = False
+        else:
+            damage, player_skip_turn = Dark.resolve_attack(rng.randint(1, 20), attack_power, stats["armor_class"])
+            enemy_health -= damage
+            if enemy_health <= 0:
+                return "win", round_number
+
+        if enemy_skip_turn:
+            enemy_skip_turn = False
+        else:
+            damage, enemy_skip_turn = Dark.resolve_attack(rng.randint(1, 20), stats["attack_power"], armor_class)
+            player_health -= damage
+            if player_health <= 0:
+                return "loss", round_number
+    return "draw", MAX_ROUNDS
+
+
+# ---------------------------
+# Batched engine
+# ---------------------------
+@lru_cache(maxsize=None)
+def kill_round_distribution(attack_power, defender_ac, target_health):
+    """
+    Probability that an attacker lands its killing blow in round 1, 2, ... (index 0 is round 1).
+
+    A skipped turn only ever affects the side that rolled the natural 1, so each side's progress
+    is independent of the other's: a fight is fully decided by the round in which each side
+    would finish the other off. The missing probability mass is "never" (within MAX_ROUNDS).
+    """
+    outcomes = Counter(Dark.resolve_attack(roll, attack_power, defender_ac) for roll in range(1, 21))
+    if max(damage for damage, _ in outcomes) <= 0:
+        return ()
+
+    states = {(0, False): 1.0}  # (damage dealt so far, skipping the next turn) -> probability
+    distribution = []
+    while len(distribution) < MAX_ROUNDS and sum(states.values()) > NEGLIGIBLE:
+        killed = 0.0
+        next_states = defaultdict(float)
+        for (dealt, skipping), probability in states.items():
+            if skipping:
+                next_states[dealt, False] += probability
+                continue
+            for (damage, skip_next), rolls in outcomes.items():
+                outcome_probability = probability * rolls / 20
+                if dealt + damage >= target_health:
+                    killed += outcome_probability
+                else:
+                    next_states[dealt + damage, skip_next] += outcome_probability
+        distribution.append(killed)
+        states = next_states
+    return tuple(distribution)
+
+
+def sample_kill_rounds(distribution, count, rng):
+    """Draws `count` kill rounds from a kill_round_distribution(); NEVER stands for no kill."""
+    cumulative = list(accumulate([*distribution, max(0.0, 1.0 - sum(distribution))]))
+    if numpy is not None and isinstance(rng, numpy.random.Generator):
+        rounds = numpy.searchsorted(numpy.array(cumulative), rng.random(count) * cumulative[-1], side="right") + 1
+        rounds[rounds > len(distribution)] = NEVER
+        return rounds
+    population = [*range(1, len(distribution) + 1), NEVER]
+    return rng.choices(population, cum_weights=cumulative, k=count)
+
+
+@dataclass
+class BatchResult:
+    """Outcome counts of a batch of fights and how many rounds they lasted."""
+    fights: int
+    wins: int
+    draws: int
+    rounds: Counter = field(default_factory=Counter)  # Rounds a decided fight lasted -> number of fights
+
+    @property
+    def losses(self):
+        return self.fights - self.wins - self.draws
+
+    @property
+    def win_rate(self):
+        return self.wins / self.fights if self.fights else 0.0
+
+    def mean_rounds(self):
+        decided = self.fights - self.draws
+        return sum(rounds * count for rounds, count in self.rounds.items()) / decided if decided else 0.0
+
+    def percentile_rounds(self, fraction):
+        """Smallest round count that at least `fraction` of the decided fights ended within."""
+        target = fraction * (self.fights - self.draws)
+        seen = 0
+        for rounds in sorted(self.rounds):
+            seen += self.rounds[rounds]
+            if seen >= target:
+                return rounds
+        return 0
+
+
+def simulate_batch(enemy, attack_power, armor_class, fights, rng, player_health=100):
+    """
+    Runs `fights` fights at once. Instead of looping over every roll, each fight draws the round
+    in which the player and the enemy would each land their killing blow, from the exact
+    per-side distributions; the player wins if theirs comes first or in the same round, since
+    the player attacks first. `rng` is a random.Random, or a numpy Generator for vectorised draws.
+    """
+    stats = Dark.ENEMIES[enemy]
+    player_rounds = sample_kill_rounds(
+        kill_round_distribution(attack_power, stats["armor_class"], stats["health"]), fights, rng)
+    enemy_rounds = sample_kill_rounds(
+        kill_round_distribution(stats["attack_power"], armor_class, player_health), fights, rng)
+
+    if numpy is not None and isinstance(player_rounds, numpy.ndarray):
+        lengths = numpy.minimum(player_rounds, enemy_rounds)
+        draws = int(numpy.count_nonzero(lengths == NEVER))
+        wins = int(numpy.count_nonzero(player_rounds <= enemy_rounds)) - draws
+        values, counts = numpy.unique(lengths[lengths != NEVER], return_counts=True)
+        rounds = Counter(dict(zip(values.tolist(), counts.tolist())))
+    else:
+        rounds = Counter(map(min, player_rounds, enemy_rounds))
+        draws = rounds.pop(NEVER, 0)
+        wins = sum(map(le, player_rounds, enemy_rounds)) - draws
+    return BatchResult(fights, wins, draws, rounds)
+
+
+def simulate_batch_by_turns(enemy, attack_power, armor_class, fights, rng, player_health=100):
+    """simulate_batch() played out one roll at a time with simulate_fight(); slow, for cross-checking."""
+    result = BatchResult(fights, 0, 0)
+    for _ in range(fights):
+        outcome, rounds = simulate_fight(enemy, attack_power, armor_class, rng, player_health)
+        if outcome == "draw":
+            result.draws += 1
+            continue
+        result.wins += outcome == "win"
+        result.rounds[rounds] += 1
+    return result
+
+
+# ---------------------------
+# Command line
+# ---------------------------
+def parse_values(text):
+    """'5', '5-15' or '5,7,9' -> list of ints."""
+    values = []
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        values.extend(range(int(low), int(high or low) + 1))
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Dark.py fights to balance the encounters.")
+    parser.add_argument("--enemy", choices=[*Dark.ENEMIES, "all"], default="all", help="Encounter to simulate")
+    parser.add_argument("--attack", type=parse_values, default=parse_values("5-15"),
+                        help="Player Attack Power values, e.g. 10, 5-15 or 6,8,10 (default: 5-15)")
+    parser.add_argument("--armor-class", type=parse_values, default=parse_values("10-20"),
+                        help="Player Armor Class values (default: 10-20)")
+    parser.add_argument("--fights", type=int, default=100_000, help="Fights per (attack, armor class) pair")
+    parser.add_argument("--player-health", type=int, default=100, help="Player HP at the start of each fight")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, for reproducible runs")
+    parser.add_argument("--engine", choices=["batch", "turns"], default="batch",
+                        help="batch: sampled kill rounds (NumPy if installed); turns: roll by roll, for checking")
+    args = parser.parse_args()
+    if args.fights < 1:
+        parser.error("--fights must be at least 1")
+
+    if args.engine == "batch" and numpy is not None:
+        rng = numpy.random.default_rng(args.seed)
+    else:
+        rng = random.Random(args.seed)
+    simulate = simulate_batch if args.engine == "batch" else simulate_batch_by_turns
+    enemies = list(Dark.ENEMIES) if args.enemy == "all" else [args.enemy]
+
+    print(f"{'enemy':<7} {'atk':>4} {'ac':>4} {'win %':>7} {'draw %':>7} {'mean':>6} {'p50':>4} {'p90':>4} {'p99':>4}")
+    started = time.perf_counter()
+    total = 0
+    for enemy in enemies:
+        for attack_power in args.attack:
+            for armor_class in args.armor_class:
+                result = simulate(enemy, attack_power, armor_class, args.fights, rng, args.player_health)
+                total += result.fights
+                print(f"{enemy:<7} {attack_power:>4} {armor_class:>4} {result.win_rate:>7.2%} "
+                      f"{result.draws / result.fights:>7.2%} {result.mean_rounds():>6.2f} "
+                      f"{result.percentile_rounds(0.5):>4} {result.percentile_rounds(0.9):>4} "
+                      f"{result.percentile_rounds(0.99):>4}")
+    elapsed = time.perf_counter() - started
+    print(f"\nSimulated {total:,} fights in {elapsed:.2f}s ({total / elapsed:,.0f} fights/s, "
+          f"{'numpy' if numpy is not None and args.engine == 'batch' else 'pure Python'}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Exact combat odds for the encounters in Dark.py.
+
+A fight is a finite Markov chain: at the start of each round it is in a state
+(player hits left, enemy hits left, player skips this turn, enemy skips this turn). The solver
+works through those states from the nearly-dead ones upwards and gives the exact win probability
+and expected number of rounds for any enemy, Attack Power and Armor Class. Results are cached in a
+JSON table on disk, so later lookups are a dictionary access.
+
+Usage:
+    python dark_solver.py                      # precompute the Attack Power x Armor Class 1-20 grid
+    python dark_solver.py --enemy dragon --attack 12 --armor-class 15
+"""
+import argparse
+import json
+import math
+import os
+import time
+from collections import Counter
+from itertools import product
+
+import Dark
+
+CACHE_VERSION = 1
+DEFAULT_CACHE = "dark_solver_cache.json"
+GRID = range(1, 21)  # Attack Power and Armor Class values precomputed by default
+FLAGS = list(product((False, True), repeat=2))  # (player skips this turn, enemy skips this turn)
+
+
+# ---------------------------
+# Markov Chain Solver
+# ---------------------------
+def attack_outcomes(attacker_power, defender_ac, target_health):
+    """
+    Turns Dark.resolve_attack into (hits dealt, skip_next_turn, probability) over the 20 rolls,
+    plus the number of hits that kills the target. Damage only ever comes in multiples of the
+    attack power, so counting hits instead of HP keeps the state space small.
+    An attacker without positive attack power can never kill and deals no hits.
+    """
+    rolls = Counter(Dark.resolve_attack(roll, attacker_power, defender_ac) for roll in range(1, 21))
+    if attacker_power <= 0:
+        return [(0, skip_next, count / 20) for (_, skip_next), count in rolls.items()], 1
+    outcomes = [(damage // attacker_power, skip_next, count / 20) for (damage, skip_next), count in rolls.items()]
+    return outcomes, math.ceil(target_health / attacker_power)
+
+
+def solve_linear(matrix, rhs):
+    """Solves a small dense system with Gaussian elimination (partial pivoting); rhs has one column per system."""
+    size = len(matrix)
+    rows = [matrix[i] + rhs[i] for i in range(size)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda row: abs(rows[row][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for row in range(col + 1, size):
+            factor = rows[row][col] / rows[col][col]
+            if factor:
+                rows[row] = [a - factor * b for a, b in zip(rows[row], rows[col])]
+    solution = [None] * size
+    for row in reversed(range(size)):
+        values = rows[row][size:]
+        for col in range(row + 1, size):
+            values = [v - rows[row][col] * s for v, s in zip(values, solution[col])]
+        solution[row] = [v / rows[row][row] for v in values]
+    return solution
+
+
+def solve_fight(enemy, attack_power, armor_class, player_health=100):
+    """
+    Exact (win probability, expected rounds) for a fresh fight, the player attacking first each round.
+
+    States are solved in order of increasing hits left, so every transition that deals damage
+    lands on a solved state. Rounds in which nobody deals damage (misses and skipped turns) only
+    move between the four skip-flag combinations of the same hit counts. Those self-loops are the
+    same 4x4 system for every (player hits left, enemy hits left), so it is inverted once per fight.
+    Returns (0.0, math.inf) if neither side can ever win.
+    """
+    stats = Dark.ENEMIES[enemy]
+    player_moves, enemy_hits = attack_outcomes(attack_power, stats["armor_class"], stats["health"])
+    enemy_moves, player_hits = attack_outcomes(stats["attack_power"], armor_class, player_health)
+    if attack_power <= 0 and stats["attack_power"] <= 0:
+        return 0.0, math.inf
+    skipped = [(0, False, 1.0)]
+
+    # Per FLAGS entry: the rounds that deal damage, as (hits dealt, hits taken, next FLAGS index, probability)
+    transitions = []
+    loops = [[float(i == j) for j in range(4)] for i in range(4)]
+    for index, (player_skips, enemy_skips) in enumerate(FLAGS):
+        moves = []
+        for dealt, player_skips_next, p_player in (skipped if player_skips else player_moves):
+            for taken, enemy_skips_next, p_enemy in (skipped if enemy_skips else enemy_moves):
+                next_flags = FLAGS.index((player_skips_next, enemy_skips_next))
+                if dealt == 0 and taken == 0:
+                    loops[index][next_flags] -= p_player * p_enemy
+                else:
+                    moves.append((dealt, taken, next_flags, p_player * p_enemy))
+        transitions.append(moves)
+    inverse = solve_linear(loops, [[float(i == j) for j in range(4)] for i in range(4)])
+
+    solved = {}  # (player hits left, enemy hits left) -> [(win probability, expected rounds) per FLAGS entry]
+    for player_left in range(1, player_hits + 1):
+        for enemy_left in range(1, enemy_hits + 1):
+            rhs = []
+            for moves in transitions:
+                win, rounds = 0.0, 1.0  # Every round counts once, whoever ends it
+                for dealt, taken, next_flags, probability in moves:
+                    if dealt >= enemy_left:
+                        win += probability  # The enemy falls before it can strike back
+                    elif taken < player_left:
+                        next_win, next_rounds = solved[player_left - taken, enemy_left - dealt][next_flags]
+                        win += probability * next_win
+                        rounds += probability * next_rounds
+                rhs.append((win, rounds))
+            solved[player_left, enemy_left] = [
+                (sum(w * r[0] for w, r in zip(row, rhs)), sum(w * r[1] for w, r in zip(row, rhs)))
+                for row in inverse
+            ]
+
+    win, rounds = solved[player_hits, enemy_hits][FLAGS.index((False, False))]
+    return min(max(win, 0.0), 1.0), rounds
+
+
+def solve_by_kill_rounds(enemy, attack_power, armor_class, player_health=100):
+    """
+    The same answer from dark_sim's per-side kill-round distributions, as an independent check:
+    the player wins if their killing round comes no later than the enemy's.
+    """
+    import dark_sim
+
+    stats = Dark.ENEMIES[enemy]
+    player = dark_sim.kill_round_distribution(attack_power, stats["armor_class"], stats["health"])
+    enemy_side = dark_sim.kill_round_distribution(stats["attack_power"], armor_class, player_health)
+    # Chances that each side has not landed its killing blow before the current round
+    player_pending = enemy_pending = 1.0
+    win = rounds = 0.0
+    for round_number in range(1, max(len(player), len(enemy_side)) + 1):
+        p_player = player[round_number - 1] if round_number <= len(player) else 0.0
+        p_enemy = enemy_side[round_number - 1] if round_number <= len(enemy_side) else 0.0
+        win += p_player * enemy_pending
+        rounds += round_number * (p_player * enemy_pending + p_enemy * (player_pending - p_player))
+        player_pending -= p_player
+        enemy_pending -= p_enemy
+    return win, rounds
+
+
+# ---------------------------
+# On-Disk Table
+# ---------------------------
+class CombatTable:
+    """
+    Solved fights keyed by "enemy:attack:armor_class:player_health", loaded from and saved to a JSON
+    file. The file records the enemy stats it was computed with and is ignored if they change.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not read solver cache {path}: {e}")
+                return
+            if data.get("version") == CACHE_VERSION and data.get("enemies") == Dark.ENEMIES:
+                self.entries = data["entries"]
+            else:
+                print(f"Notice: {path} was computed with different rules or enemy stats; recomputing.")
+
+    def lookup(self, enemy, attack_power, armor_class, player_health=100):
+        """(win probability, expected rounds), solving and remembering the fight on a miss."""
+        key = f"{enemy}:{attack_power}:{armor_class}:{player_health}"
+        entry = self.entries.get(key)
+        if entry is None:
+            win, rounds = solve_fight(enemy, attack_power, armor_class, player_health)
+            entry = self.entries[key] = [win, rounds if math.isfinite(rounds) else None]
+            self.dirty = True
+        win, rounds = entry
+        return win, math.inf if rounds is None else rounds
+
+    def precompute(self, enemies, attack_values=GRID, armor_values=GRID, player_health=100):
+        for enemy, attack_power, armor_class in product(enemies, attack_values, armor_values):
+            self.lookup(enemy, attack_power, armor_class, player_health)
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "enemies": Dark.ENEMIES, "entries": self.entries}, f)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+
+# ---------------------------
+# Command line
+# ---------------------------
+def main():
+    from dark_sim import parse_values
+
+    parser = argparse.ArgumentParser(description="Exact win probabilities for Dark.py fights.")
+    parser.add_argument("--enemy", choices=[*Dark.ENEMIES, "all"], default="all", help="Encounter to solve")
+    parser.add_argument("--attack", type=parse_values, default=list(GRID),
+                        help="Player Attack Power values, e.g. 10, 5-15 or 6,8,10 (default: 1-20)")
+    parser.add_argument("--armor-class", type=parse_values, default=list(GRID),
+                        help="Player Armor Class values (default: 1-20)")
+    parser.add_argument("--player-health", type=int, default=100, help="Player HP at the start of the fight")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help=f"Table file (default: {DEFAULT_CACHE}); '' disables it")
+    parser.add_argument("--check", action="store_true",
+                        help="Cross-check every result against dark_sim's kill-round distributions")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary line, not the table")
+    args = parser.parse_args()
+
+    enemies = list(Dark.ENEMIES) if args.enemy == "all" else [args.enemy]
+    started = time.perf_counter()
+    table = CombatTable(args.cache)
+    cached = len(table.entries)
+    table.precompute(enemies, args.attack, args.armor_class, args.player_health)
+    table.save()
+    elapsed = time.perf_counter() - started
+
+    if not args.quiet:
+        print(f"{'enemy':<7} {'atk':>4} {'ac':>4} {'win %':>9} {'rounds':>8}")
+    worst = 0.0
+    for enemy, attack_power, armor_class in product(enemies, args.attack, args.armor_class):
+        win, rounds = table.lookup(enemy, attack_power, armor_class, args.player_health)
+        if not args.quiet:
+            print(f"{enemy:<7} {attack_power:>4} {armor_class:>4} {win:>9.4%} {rounds:>8.3f}")
+        if args.check and math.isfinite(rounds):
+            check_win, check_rounds = solve_by_kill_rounds(enemy, attack_power, armor_class, args.player_health)
+            worst = max(worst, abs(win - check_win), abs(rounds - check_rounds) / rounds)
+
+    fights = len(enemies) * len(args.attack) * len(args.armor_class)
+    print(f"\n{fights:,} fights ready in {elapsed:.2f}s ({len(table.entries) - cached:,} solved, "
+          f"{cached:,} from {args.cache or 'no cache'}).")
+    if args.check:
+        print(f"Largest difference from the kill-round distributions: {worst:.2e}")
+
+
+if __name__ == "__main__":
+    main()